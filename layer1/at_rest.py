@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Compressed at-rest storage for Layer 1 artifacts (shared by the Layer 1 writers and Layer 2 readers)
+- Codecs: "gz" (stdlib, always available) and "zst" (needs the zstandard module; falls back to gz)
+- A compressed artifact keeps its logical name plus the codec suffix: source_001.html.gz,
+  <slug>.body.json.zst, layer1/blobs/<sha256>.gz
+- Readers ask for the logical path; resolve() finds whichever variant exists (newest wins when
+  several do) and open_read() decompresses as a stream — straight into the caller, no temp files
+- Only text artifacts are compressed (HTML / JSON / XML / text); sidecar .meta.json files and
+  screenshots stay as they are
+- CLI: python3 layer1/at_rest.py compress <dir> [--codec gz|zst] [--validators <json>]
+  compresses existing text artifacts in place (e.g. layer1/snaps, layer1/out/<run>); default codec
+  gz, and asking for zst without zstandard warns on stderr before falling back to gz
+- Bodies that layer1/cache/validators.json (body_store "files") points at are renamed by compressing
+  them, so the CLI rewrites those entries' "path" to the stored name — conditional GETs and body reuse
+  keep working on the next fetch
+"""
+
+import os, sys, io, json, gzip, pathlib, argparse
+
+# Optional zstandard (pip install zstandard); "zst" falls back to gz without it
+try:
+    import zstandard as _zstd  # type: ignore
+except Exception:
+    _zstd = None
+
+SUFFIXES = {"gz": ".gz", "zst": ".zst"}
+TEXT_SUFFIXES = (".html", ".json", ".xml", ".txt")
+CHUNK_SIZE = 64 * 1024
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+def codec_for(mode) -> str | None:
+    """Normalize a config/env value: None/""/"none"/"off" → None; "gzip" → "gz"; "zstd" → "zst" (gz without zstandard)."""
+    m = str(mode or "").strip().lower()
+    if m in ("", "none", "off", "0", "false"):
+        return None
+    if m in ("gz", "gzip"):
+        return "gz"
+    if m in ("zst", "zstd", "zstandard"):
+        return "zst" if _zstd is not None else "gz"
+    raise ValueError(f"unknown compression {mode!r} (expected none, gz or zst)")
+
+def codec_of(path) -> str | None:
+    """Codec a stored file was written with, from its suffix."""
+    name = str(path)
+    for codec, suffix in SUFFIXES.items():
+        if name.endswith(suffix):
+            return codec
+    return None
+
+def logical_name(name: str) -> str:
+    """source_001.html.gz -> source_001.html (unchanged when uncompressed)."""
+    codec = codec_of(name)
+    return name[: -len(SUFFIXES[codec])] if codec else name
+
+def stored_path(path, codec: str | None) -> pathlib.Path:
+    """Where a logical path lives when written with codec."""
+    path = pathlib.Path(path)
+    return path.with_name(path.name + SUFFIXES[codec]) if codec else path
+
+def is_text(name: str) -> bool:
+    return logical_name(str(name)).lower().endswith(TEXT_SUFFIXES)
+
+def variants(path) -> list[pathlib.Path]:
+    """Every existing stored form of a logical path (plain, .gz, .zst)."""
+    path = pathlib.Path(path)
+    base = path.with_name(logical_name(path.name))
+    return [p for p in (base, *(stored_path(base, c) for c in SUFFIXES)) if p.is_file()]
+
+def resolve(path) -> pathlib.Path | None:
+    """The stored file for a logical (or already stored) path; the newest variant if several exist."""
+    path = pathlib.Path(path)
+    if codec_of(path.name) and path.is_file():
+        return path
+    found = variants(path)
+    if not found:
+        return None
+    return found[0] if len(found) == 1 else max(found, key=lambda p: p.stat().st_mtime)
+
+def exists(path) -> bool:
+    return resolve(path) is not None
+
+# =========================
+# Writing
+# =========================
+def open_write(path, codec: str | None):
+    """Binary writer for a stored path (already carrying its suffix); compresses on the fly."""
+    if codec is None:
+        return open(path, "wb")
+    if codec == "gz":
+        return gzip.GzipFile(path, "wb", GZIP_LEVEL, mtime=0)  # mtime=0: same body, same bytes
+    if codec == "zst":
+        if _zstd is None:
+            raise RuntimeError("zst storage needs the zstandard module")
+        return _zstd.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(path, "wb"), closefd=True)
+    raise ValueError(f"unknown codec {codec!r}")
+
+def write_bytes(path, data: bytes, codec: str | None) -> pathlib.Path:
+    """Write a logical path with codec (atomically) and drop any other stored variant of it."""
+    target = stored_path(path, codec)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    with open_write(tmp, codec) as w:
+        w.write(data)
+    tmp.replace(target)
+    for p in variants(path):
+        if p != target:
+            p.unlink(missing_ok=True)
+    return target
+
+def write_text(path, text: str, codec: str | None) -> pathlib.Path:
+    return write_bytes(path, text.encode("utf-8"), codec)
+
+def compress_file(path, codec: str) -> pathlib.Path:
+    """Compress an existing plain file in place (streamed); returns the stored path."""
+    path = pathlib.Path(path)
+    target = stored_path(path, codec)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    with open(path, "rb") as r, open_write(tmp, codec) as w:
+        for chunk in iter(lambda: r.read(CHUNK_SIZE), b""):
+            w.write(chunk)
+    st = path.stat()
+    tmp.replace(target)
+    os.utime(target, (st.st_atime, st.st_mtime))  # keep "newest variant" ordering meaningful
+    path.unlink()
+    return target
+
+# =========================
+# Reading (transparent)
+# =========================
+def open_read(path):
+    """Binary reader over the decompressed content of a logical or stored path."""
+    stored = resolve(path)
+    if stored is None:
+        raise FileNotFoundError(str(path))
+    codec = codec_of(stored.name)
+    if codec == "gz":
+        return gzip.open(stored, "rb")
+    if codec == "zst":
+        if _zstd is None:
+            raise RuntimeError(f"{stored} is zstd-compressed; pip install zstandard to read it")
+        return _zstd.ZstdDecompressor().stream_reader(open(stored, "rb"), closefd=True)
+    return open(stored, "rb")
+
+def read_bytes(path) -> bytes:
+    with open_read(path) as r:
+        buf = io.BytesIO()
+        for chunk in iter(lambda: r.read(CHUNK_SIZE), b""):
+            buf.write(chunk)
+        return buf.getvalue()
+
+def read_text(path, errors: str = "ignore") -> str:
+    """Like open(path, encoding="utf-8", errors=errors).read(), universal newlines included."""
+    with io.TextIOWrapper(open_read(path), encoding="utf-8", errors=errors) as r:
+        return r.read()
+
+def load_json(path):
+    return json.loads(read_bytes(path))
+
+def decoded_size(path) -> int:
+    """Content size (after decompression) without holding it in memory."""
+    stored = resolve(path)
+    if stored is None:
+        raise FileNotFoundError(str(path))
+    if codec_of(stored.name) is None:
+        return stored.stat().st_size
+    n = 0
+    with open_read(stored) as r:
+        for chunk in iter(lambda: r.read(CHUNK_SIZE), b""):
+            n += len(chunk)
+    return n
+
+# =========================
+# CLI
+# =========================
+def compress_dir(root: pathlib.Path, codec: str, moved: dict | None = None) -> tuple[int, int, int]:
+    """Compress plain text artifacts (not .meta.json sidecars) under root; returns (files, bytes before, after).
+    moved (if given) collects {resolved plain path: stored path} for every file compressed."""
+    files = before = after = 0
+    for p in sorted(root.rglob("*")):
+        if not p.is_file() or p.name.startswith(".") or codec_of(p.name):
+            continue
+        if p.name.endswith(".meta.json") or p.name == "l1_summary.json" or p.name.endswith(".ndjson"):
+            continue
+        if not is_text(p.name):
+            continue
+        size = p.stat().st_size
+        out = compress_file(p, codec)
+        if moved is not None:
+            moved[p.resolve()] = out
+        files, before, after = files + 1, before + size, after + out.stat().st_size
+    return files, before, after
+
+def rewrite_validators(path: pathlib.Path, moved: dict) -> int:
+    """Point validator cache entries at the compressed names of the bodies they reference; returns entries changed."""
+    try:
+        entries = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return 0
+    if not isinstance(entries, dict):
+        return 0
+    changed = 0
+    for v in entries.values():
+        if not isinstance(v, dict) or not v.get("path"):
+            continue
+        out = moved.get(pathlib.Path(v["path"]).resolve())
+        if out is None:
+            continue
+        v["path"] = str(stored_path(v["path"], codec_of(out.name)))  # same relative/absolute form as before
+        changed += 1
+    if changed:
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(entries, indent=2, sort_keys=True), encoding="utf-8")
+        tmp.replace(path)
+    return changed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compressed at-rest storage for Layer 1 artifacts")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compress", help="compress existing text artifacts in place")
+    c.add_argument("dirs", nargs="+", help="directories to walk (e.g. layer1/snaps layer1/out)")
+    c.add_argument("--codec", default="gz", help="gz or zst (zst falls back to gz without zstandard)")
+    c.add_argument("--validators", default="layer1/cache/validators.json",
+                   help="validator cache whose body paths follow the renames (skipped if missing)")
+    args = ap.parse_args(argv)
+    codec = codec_for(args.codec)
+    if codec is None:
+        raise SystemExit("ERROR: --codec must be gz or zst")
+    if codec == "gz" and args.codec.strip().lower() in ("zst", "zstd", "zstandard"):
+        print("⚠️  zstandard is not installed; compressing with gz instead (pip install zstandard)", file=sys.stderr)
+    moved = {}
+    for d in args.dirs:
+        files, before, after = compress_dir(pathlib.Path(d), codec, moved)
+        print(json.dumps({"dir": d, "codec": codec, "files": files, "bytes_before": before, "bytes_after": after}))
+    validators = pathlib.Path(args.validators)
+    if moved and validators.is_file():
+        changed = rewrite_validators(validators, moved)
+        print(json.dumps({"validators": str(validators), "entries_rewritten": changed}))
+
+if __name__ == "__main__":
+    main()
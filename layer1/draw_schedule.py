@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Draw-calendar-aware scheduling for Layer 1 (used by layer1/fetch.py and scripts/snap.js)
+- Game draw calendar (weekdays, local draw time, timezone) from layer1/draw_calendar.yaml
+- Targets map to the games they publish (regex on the URL); unmapped targets are always due
+- Last parsed draw date per source + game from the newest layer2/out/<run>/latest-draws.json
+  (layer2/out/LATEST when it names one, see layer1/retention.py)
+  ("source_dates"; older outputs fall back to the records' source_url)
+- A target is due once any of its games has had a draw after the last parsed one
+  (+ publish_lag_min); no history, or a date in the future, counts as due
+- CLI: python3 layer1/draw_schedule.py [targets.txt|-] [--json]
+  prints the due targets one per line, or {"mode", "plan"} as JSON
+"""
+
+import sys, json, re, pathlib, datetime, argparse
+
+import retention  # layer1/retention.py: LATEST run pointers
+
+CALENDAR_PATH = pathlib.Path("layer1/draw_calendar.yaml")
+L2_OUT = pathlib.Path("layer2/out")
+WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+def _tz(name):
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name or "America/New_York")
+    except Exception:
+        return datetime.timezone(datetime.timedelta(hours=-5))  # no tz database: assume ET (standard time)
+
+def load_calendar(path: pathlib.Path = CALENDAR_PATH) -> dict:
+    """{"games": {name: {days, time, tz}}, "targets": [(regex, [games])], "publish_lag_min", "mode"}."""
+    try:
+        import yaml  # type: ignore
+        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except Exception:
+        data = {}
+    games = {}
+    for name, g in (data.get("games") or {}).items():
+        if not isinstance(g, dict):
+            continue
+        days = set()
+        for d in g.get("days") or []:
+            d = str(d).strip().lower()
+            if d == "daily":
+                days = set(range(7))
+            elif d[:3] in WEEKDAYS:
+                days.add(WEEKDAYS[d[:3]])
+        try:
+            hh, mm = (int(x) for x in str(g.get("time", "23:59")).split(":")[:2])
+            draw_time = datetime.time(hh, mm)
+        except ValueError:
+            draw_time = datetime.time(23, 59)
+        games[str(name)] = {"days": days, "time": draw_time, "tz": _tz(g.get("tz"))}
+    targets = []
+    for t in data.get("targets") or []:
+        try:
+            targets.append((re.compile(str(t["match"]), re.I), [x for x in t.get("games") or [] if x in games]))
+        except (KeyError, TypeError, AttributeError, re.error):
+            continue
+    return {
+        "games": games,
+        "targets": targets,
+        "publish_lag_min": float(data.get("publish_lag_min", 60) or 0),
+        "mode": str(data.get("mode", "skip")).lower(),
+    }
+
+def latest_layer2_output(root: pathlib.Path = L2_OUT) -> pathlib.Path | None:
+    run = retention.latest_run(root, require="latest-draws.json")
+    return run / "latest-draws.json" if run else None
+
+def _key(url: str) -> str:
+    return url.strip().rstrip("/").lower()
+
+def last_draw_dates(path: pathlib.Path | None) -> dict:
+    """{normalized source url: {game: "YYYY-MM-DD"}} from a Layer 2 output."""
+    if path is None:
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    out = {}
+    src = data.get("source_dates")
+    if isinstance(src, dict):
+        for url, games in src.items():
+            if isinstance(games, dict):
+                out[_key(url)] = dict(games)
+        return out
+    for r in data.get("records") or []:
+        url, game, date = r.get("source_url"), r.get("game"), str(r.get("date") or "")
+        if url and game and ISO_DATE.match(date):
+            d = out.setdefault(_key(url), {})
+            if date > d.get(game, ""):
+                d[game] = date
+    return out
+
+def next_draw_after(game: dict, day: datetime.date) -> datetime.datetime | None:
+    """First scheduled draw on a day after `day` (aware, in the game's timezone)."""
+    for i in range(1, 8):
+        d = day + datetime.timedelta(days=i)
+        if d.weekday() in game["days"]:
+            return datetime.datetime.combine(d, game["time"], tzinfo=game["tz"])
+    return None
+
+def games_for(url: str, cal: dict) -> list[str]:
+    games = []
+    for rx, names in cal["targets"]:
+        if rx.search(url):
+            games.extend(n for n in names if n not in games)
+    return games
+
+def plan(urls, cal: dict | None = None, dates: dict | None = None,
+         now: datetime.datetime | None = None) -> list[dict]:
+    """[{"url", "due", "games", "reason"}] in input order."""
+    cal = cal if cal is not None else load_calendar()
+    dates = dates if dates is not None else last_draw_dates(latest_layer2_output())
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    lag = datetime.timedelta(minutes=cal["publish_lag_min"])
+    out = []
+    for url in urls:
+        games = games_for(url, cal)
+        known = dates.get(_key(url), {})
+        due, reason, waits = not games, "not on the draw calendar", []
+        for g in games:
+            game = cal["games"][g]
+            last = str(known.get(g) or "")
+            if not ISO_DATE.match(last):
+                due, reason = True, f"{g}: no parsed draw yet"
+                break
+            last_day = datetime.date.fromisoformat(last)
+            if last_day > now.astimezone(game["tz"]).date():
+                due, reason = True, f"{g}: parsed date {last} is in the future"
+                break
+            nxt = next_draw_after(game, last_day)
+            if nxt is None or now >= nxt + lag:
+                due, reason = True, f"{g}: new draw since {last}"
+                break
+            waits.append(nxt + lag)
+        if not due and waits:
+            reason = f"no new draw before {min(waits).astimezone(datetime.timezone.utc):%Y-%m-%d %H:%MZ}"
+        out.append({"url": url, "due": due, "games": games, "reason": reason})
+    return out
+
+def read_urls(src) -> list[str]:
+    """First token of each non-comment line (same tolerance as fetch.py's target parsing)."""
+    urls = []
+    for line in src:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        tok = line.split()[0]
+        if tok.startswith(("http://", "https://")):
+            urls.append(tok)
+    return urls
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Which Layer 1 targets can have a new draw right now")
+    ap.add_argument("targets", nargs="?", default="layer1/targets.txt", help="targets file, or - for stdin")
+    ap.add_argument("--json", action="store_true", help="print the full plan as JSON")
+    args = ap.parse_args(argv)
+    if args.targets == "-":
+        urls = read_urls(sys.stdin)
+    else:
+        with open(args.targets, encoding="utf-8") as f:
+            urls = read_urls(f)
+    cal = load_calendar()
+    result = plan(urls, cal)
+    if args.json:
+        print(json.dumps({"mode": cal["mode"], "plan": result}, indent=2))
+    else:
+        for p in result:
+            if p["due"]:
+                print(p["url"])
+
+if __name__ == "__main__":
+    main()
@@ -2,31 +2,73 @@
 """
 Layer 1 — Fetch (robust + verbose)
 - Polite pacing (global + per-domain from layer1/pacing.yaml)
-- Random jitter, per-host delay; retries with exponential backoff
-- Rotating User-Agents + realistic headers; gzip decoding
+- Random jitter, per-host delay; retries with exponential backoff (per-domain base/cap)
+- A retryable Retry-After requeues the URL behind the host's hold; no worker slot sleeps through it
+- Adaptive per-host pacing: AIMD on the delay from 429/503, Retry-After and latency (time to response
+  headers, not body download); learned across runs
+- Per-host circuit breaker: N consecutive connection failures / 5xx → remaining URLs skipped (circuit_open)
+  for a cool-down that persists across runs; one trial request after it expires (half-open)
+- Rotating User-Agents + realistic headers; gzip / deflate (zlib or raw) / brotli decoding
+- Accept-Encoding advertises br only when a brotli module is importable
+- Streaming bodies: chunked read → on-the-fly decompress → sha256 + disk in one pass (max body size per host)
 - Smart Accept header: JSON-first for API-ish URLs (+ X-Requested-With for .asmx)
 - Content-type aware file extensions (+ simple sniff fallback)
 - Sidecar .meta.json per file (headers, checksum, timing, UA, request headers)
-- Rich l1_summary.json (counts, hosts, defaults)
+- Rich l1_summary.json (counts, hosts, defaults), built from the run journal in a streaming pass
+- Append-only run journal (out/<run>/journal.ndjson, flushed per URL); --resume <run_id> continues a crashed run
 - FAST / LIMIT env toggles for quick local runs
 - TARGETS_FILE env selects which list to fetch (defaults to layer1/targets.txt)
-- Optional depth-1 same-site expansion via layer1/expand.yaml
+- Optional depth-1 same-site expansion via layer1/expand.yaml (compiled once; inherit: resolved;
+  allow/deny matched against the URL path, and path?query for query-aware rules)
+- Expansion links are scanned from body bytes as they stream in; stops at the host's max_new
+  (queued in parent-index order, so source_NNN numbering does not depend on completion order)
 - Unbuffered logs when PYTHONUNBUFFERED=1 (set in run.sh)
 - Graceful Ctrl+C (partial summary still written)
+- Concurrent fetch across hosts (bounded worker pool; one in-flight request per host)
+- Keep-alive connection pool per host (reused across targets + retries; idle/size limits)
+- In-process DNS cache (dns_ttl_sec) shared by every connection; target hosts pre-resolved concurrently;
+  per-request DNS time in sidecars
+- Conditional GET (ETag / Last-Modified) across runs; 304 reuses the previous body via hardlink
+- Content-addressed body store (layer1/blobs/<sha256>); run dirs keep sidecars that reference it
+- Optional compressed at-rest bodies (compress: gz|zst or COMPRESS env): compressed while streaming,
+  stored as <name>.gz / .zst; layer1/at_rest.py reads them back transparently (Layer 2 too)
+- Frontier: per-host FIFO deques, round-robin across hosts, dedup on canonical URLs
+- robots.txt (when respected): on-disk cache with TTL + conditional revalidation, compiled Allow/Disallow
+  matcher (wildcards, $, longest match), fetched concurrently at startup
+- Draw-calendar-aware scheduling (layer1/draw_schedule.py + draw_calendar.yaml): targets whose games
+  have had no draw since Layer 2's last parsed date reuse their previous body (SCHEDULE=0 disables;
+  l1_summary.json counts them as carried_forward, apart from ok / skipped)
 - Robust target parsing (strips comments/notes)
+- layer1/out/LATEST names the newest finished run, set once its summary is written
+  (layer1/retention.py: O(1) lookup for Layer 2, run pruning)
+- Importable engine: FetchConfig (pacing/expand/env, loaded once) + Fetcher (one run's state) + run();
+  importing has no side effects, the CLI lives in main()
 """
 
-import os, sys, json, time, random, pathlib, datetime, gzip, io, hashlib, signal, re
+import os, sys, argparse, json, time, random, pathlib, datetime, zlib, io, hashlib, signal, re, shutil, email.utils
+import threading, collections, ssl, socket, http.client
 import urllib.request, urllib.error
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from urllib.parse import urlparse, urljoin
 
+# Optional Brotli (pip install brotli — or brotlicffi); br is only advertised when available
+try:
+    import brotli as _brotli  # type: ignore
+except Exception:
+    try:
+        import brotlicffi as _brotli  # type: ignore
+    except Exception:
+        _brotli = None
+
+# layer1 siblings (layer1/ is on sys.path: the script's own dir, or the importer put it there)
+import at_rest  # layer1/at_rest.py: compressed at-rest bodies
+import retention  # layer1/retention.py: LATEST run pointer
+import draw_schedule  # layer1/draw_schedule.py: draw-calendar-aware scheduling
+
 # =========================
-# Logging / env toggles
+# Logging
 # =========================
-VERBOSE = True
-ENV_FAST   = os.getenv("FAST") == "1"                 # FAST=1 ./scripts/run.sh
-ENV_LIMIT  = int(os.getenv("LIMIT", "0") or "0")      # LIMIT=10 ./scripts/run.sh
-TARGETS_FILE = os.getenv("TARGETS") or os.getenv("TARGETS_FILE") or "layer1/targets.txt"
+VERBOSE = True  # library callers may set fetch.VERBOSE = False
 
 def log(msg: str):
     if VERBOSE:
@@ -44,6 +86,25 @@ DEFAULTS = {
     "backoff_base": 0.7,     # seconds; grows exponentially
     "backoff_cap": 5.0,      # per attempt max additional seconds
     "respect_robots": False, # set True in pacing.yaml if you want robots.txt adherence
+    "robots_ttl_sec": 86400, # reuse a cached robots.txt this long, then revalidate (ETag / Last-Modified)
+    "max_concurrency": 6,    # global cap on in-flight requests (never more than one per host)
+    "keep_alive": True,      # reuse pooled connections per host (False = fresh connection + Connection: close)
+    "pool_idle_sec": 30.0,   # drop pooled connections idle longer than this
+    "pool_max_per_host": 2,  # max idle connections kept per host
+    "dns_ttl_sec": 300,      # reuse resolved addresses this long (getaddrinfo exposes no record TTL)
+    "conditional_get": True, # send If-None-Match / If-Modified-Since from the validator cache
+    "body_store": "blobs",   # "blobs" = layer1/blobs/<sha256> + refs in sidecars; "files" = body copy per run
+    "compress": None,        # "gz" / "zst": store bodies compressed at rest (<name>.gz / .zst; see layer1/at_rest.py)
+    "max_body_bytes": 25_000_000,  # abort (no retry) once a decoded body grows past this
+    "adaptive_pacing": True, # learn per-host delay (AIMD) instead of a fixed per_host_delay
+    "min_delay": None,       # floor the learned delay may shrink to (None = per_host_delay)
+    "max_delay": 30.0,       # ceiling the learned delay may grow to
+    "speedup_step": 0.25,    # seconds shaved off the delay per healthy response
+    "latency_factor": 3.0,   # a response this many times slower than the host's average counts as a slow-down signal…
+    "latency_slow_sec": 5.0, # …but only once it is also slower than this
+    "max_retry_after": 120,  # honor Retry-After up to this many seconds; longer = give up on the URL for this run
+    "breaker_threshold": 5,  # consecutive connection failures / 5xx (attempts, across URLs) that open the host's circuit
+    "breaker_cooldown_sec": 900,  # how long an open circuit skips the host (persists across runs); 0 disables
     # Optional: per-domain can also define "headers": { "Header-Name": "Value" }
 }
 
@@ -54,6 +115,9 @@ UAS = [
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0 Safari/537.36",
 ]
 
+CHUNK_SIZE = 64 * 1024   # streaming read size; bounds peak memory per in-flight request
+SNIFF_BYTES = 1024       # decoded prefix kept for extension sniffing
+
 CT_EXT = {
     "application/json": ".json",
     "text/json": ".json",
@@ -63,26 +127,22 @@ CT_EXT = {
     "text/plain": ".txt",
 }
 
-# =========================
-# Paths
-# =========================
-RUN_ID = datetime.datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-OUT_DIR = pathlib.Path("layer1/out") / RUN_ID
-LOGS   = pathlib.Path("layer1/logs")
-OUT_DIR.mkdir(parents=True, exist_ok=True)
-LOGS.mkdir(parents=True, exist_ok=True)
-
-# Accumulators (even on Ctrl+C)
-RESULTS    = []
-HOST_STATS = {}
-_robots_cache = {}
+# FAST mode overrides (quick local test)
+FAST_OVERRIDES = {
+    "jitter_min": 0.1,
+    "jitter_max": 0.3,
+    "timeout_sec": 12,
+    "max_retries": 2,
+    "per_host_delay": 0.2,
+    "backoff_base": 0.3,
+    "backoff_cap": 1.2,
+}
 
 # =========================
 # pacing.yaml loader (optional)
 # =========================
-def load_pacing():
+def load_pacing(ypath: pathlib.Path) -> dict:
     cfg = {"defaults": DEFAULTS.copy(), "domains": {}}
-    ypath = pathlib.Path("layer1/pacing.yaml")
     if not ypath.exists():
         return cfg
     try:
@@ -101,13 +161,10 @@ def load_pacing():
         pass
     return cfg
 
-PACING = load_pacing()
-
 # =========================
 # expand.yaml loader (optional)
 # =========================
-def load_expand():
-    ypath = pathlib.Path("layer1/expand.yaml")
+def load_expand(ypath: pathlib.Path) -> dict:
     if not ypath.exists():
         return {}
     try:
@@ -118,86 +175,310 @@ def load_expand():
     except Exception:
         return {}
 
-EXPAND = load_expand()
+def compile_expand(raw: dict) -> dict:
+    """
+    host -> {"allow": regex|None, "deny": regex|None, "max_new": int}.
+    `inherit: other.host` chains are resolved (local keys win) and each host's
+    allow/deny lists are folded into one case-insensitive alternation.
+    Invalid patterns are reported once and skipped.
+    """
+    warned = set()
 
-# FAST mode overrides (quick local test)
-if ENV_FAST:
-    PACING["defaults"]["jitter_min"]    = 0.1
-    PACING["defaults"]["jitter_max"]    = 0.3
-    PACING["defaults"]["timeout_sec"]   = 12
-    PACING["defaults"]["max_retries"]   = 2
-    PACING["defaults"]["per_host_delay"]= 0.2
-    PACING["defaults"]["backoff_base"]  = 0.3
-    PACING["defaults"]["backoff_cap"]   = 1.2
-
-def domain_cfg(host: str):
-    d = PACING.get("domains", {}).get(host, {})
-    # fallback to eTLD+1-ish if subdomain entry missing
-    if not d and host.count(".") >= 2:
-        parts = host.split(".")
-        candidate = ".".join(parts[-2:])
-        d = PACING.get("domains", {}).get(candidate, {})
-    merged = PACING["defaults"].copy()
-    headers = {}
-    if isinstance(d, dict):
-        for k, v in d.items():
-            if k == "headers" and isinstance(v, dict):
-                headers = {str(hk): str(hv) for hk, hv in v.items()}
-            elif k in merged:
-                merged[k] = v
-    merged["headers"] = headers
-    return merged
-
-# =========================
-# robots.txt (optional, light)
-# =========================
-def robots_disallows(host: str):
-    """Return list of disallow prefixes for '*' from robots.txt, cached."""
-    if host in _robots_cache:
-        return _robots_cache[host]
-    rules = []
-    try:
-        url = f"https://{host}/robots.txt"
-        req = urllib.request.Request(url, headers={"User-Agent": random.choice(UAS)})
-        with urllib.request.urlopen(req, timeout=10) as r:
-            txt = r.read().decode("utf-8", errors="ignore")
-        ua_any = False
-        for line in txt.splitlines():
-            line = line.strip()
-            if not line or line.startswith("#"):
+    def resolve(host, stack=()):
+        node = raw.get(host)
+        if not isinstance(node, dict) or host in stack:
+            return {}
+        parent = node.get("inherit")
+        merged = dict(resolve(parent, stack + (host,))) if parent else {}
+        merged.update({k: v for k, v in node.items() if k != "inherit"})
+        return merged
+
+    def alternation(host, patterns):
+        parts = []
+        for p in patterns or []:
+            try:
+                re.compile(str(p))
+            except re.error as e:
+                if p not in warned:
+                    warned.add(p)
+                    log(f"⚠️  expand.yaml ({host}): skipping invalid pattern {p!r}: {e}")
                 continue
-            low = line.lower()
-            if low.startswith("user-agent:"):
-                ua = line.split(":", 1)[1].strip().lower()
-                ua_any = (ua == "*" or "refineryplanet" in ua)
-            elif ua_any and low.startswith("disallow:"):
-                path = line.split(":", 1)[1].strip()
-                if path:
-                    rules.append(path)
-            elif low.startswith("user-agent:"):
-                ua_any = False
-    except Exception:
-        rules = []
-    _robots_cache[host] = rules
-    return rules
+            parts.append(f"(?:{p})")
+        return re.compile("|".join(parts), re.I) if parts else None
 
-def allowed_by_robots(host: str, path: str):
-    rules = robots_disallows(host)
-    if not rules:
-        return True
-    for pref in rules:
+    compiled = {}
+    for host in raw:
+        r = resolve(host)
+        compiled[host] = {
+            "allow": alternation(host, r.get("allow")),
+            "deny": alternation(host, r.get("deny")),
+            "max_new": int(r.get("max_new", 0) or 0),
+        }
+    return compiled
+
+# =========================
+# Run configuration (files + env, resolved once)
+# =========================
+class FetchConfig:
+    """
+    Everything a run reads from disk and env: pacing defaults + per-domain overrides,
+    compiled expansion rules, the targets list and the layer1/ layout. Paths are relative
+    to `root` (the repo root; the default "." keeps stored paths exactly as the CLI writes them).
+    Treat as read-only once built; domain() results are cached per host.
+    """
+
+    def __init__(self, root=".", targets_file: str = "layer1/targets.txt", fast: bool = False,
+                 limit: int = 0, concurrency: int = 0, schedule: bool = True, compress: str | None = None):
+        self.root = pathlib.Path(root)
+        layer1 = self.root / "layer1"
+        self.targets_file = targets_file
+        self.fast = fast
+        self.limit = limit
+        self.schedule = schedule
+        self.pacing = load_pacing(layer1 / "pacing.yaml")
+        self.expand = compile_expand(load_expand(layer1 / "expand.yaml"))
+        if fast:
+            self.pacing["defaults"].update(FAST_OVERRIDES)
+        if concurrency > 0:
+            self.pacing["defaults"]["max_concurrency"] = concurrency
+        if compress is not None:
+            self.pacing["defaults"]["compress"] = compress
+        self.codec = at_rest.codec_for(self.defaults.get("compress"))  # None = plain files
+        self.out_root = layer1 / "out"
+        self.logs_dir = layer1 / "logs"
+        self.cache_dir = layer1 / "cache"
+        self.blobs_dir = layer1 / "blobs"
+        self._domains = {}  # host -> merged per-domain config
+
+    @classmethod
+    def from_env(cls, root=".") -> "FetchConfig":
+        """The env toggles run.sh passes through."""
+        return cls(
+            root=root,
+            targets_file=os.getenv("TARGETS") or os.getenv("TARGETS_FILE") or "layer1/targets.txt",
+            fast=os.getenv("FAST") == "1",                          # FAST=1 ./scripts/run.sh
+            limit=int(os.getenv("LIMIT", "0") or "0"),              # LIMIT=10 ./scripts/run.sh
+            concurrency=int(os.getenv("CONCURRENCY", "0") or "0"),  # CONCURRENCY=1 ./scripts/run.sh (sequential)
+            schedule=os.getenv("SCHEDULE", "1") != "0",             # SCHEDULE=0 ./scripts/run.sh (ignore the draw calendar)
+            compress=os.getenv("COMPRESS") or None,                 # COMPRESS=zst ./scripts/run.sh (compressed bodies)
+        )
+
+    @property
+    def defaults(self) -> dict:
+        return self.pacing["defaults"]
+
+    @property
+    def targets_path(self) -> pathlib.Path:
+        return self.root / self.targets_file
+
+    @property
+    def use_blobs(self) -> bool:
+        return str(self.defaults.get("body_store", DEFAULTS["body_store"])).lower() == "blobs"
+
+    @property
+    def max_concurrency(self) -> int:
+        return max(1, int(self.defaults.get("max_concurrency", 1) or 1))
+
+    def domain(self, host: str) -> dict:
+        """defaults merged with the host's pacing.yaml entry (shared dict; don't mutate)."""
+        merged = self._domains.get(host)
+        if merged is not None:
+            return merged
+        d = self.pacing.get("domains", {}).get(host, {})
+        # fallback to eTLD+1-ish if subdomain entry missing
+        if not d and host.count(".") >= 2:
+            parts = host.split(".")
+            candidate = ".".join(parts[-2:])
+            d = self.pacing.get("domains", {}).get(candidate, {})
+        merged = self.defaults.copy()
+        headers = {}
+        if isinstance(d, dict):
+            for k, v in d.items():
+                if k == "headers" and isinstance(v, dict):
+                    headers = {str(hk): str(hv) for hk, hv in v.items()}
+                elif k in merged:
+                    merged[k] = v
+        merged["headers"] = headers
+        self._domains[host] = merged
+        return merged
+
+    def expand_rule(self, host: str) -> dict | None:
+        """Compiled rule for host, falling back to www.<host> and then the bare eTLD+1-ish domain."""
+        rule = self.expand.get(host) or self.expand.get("www." + host)
+        if rule is None and host.count(".") >= 1:
+            rule = self.expand.get(".".join(host.split(".")[-2:]))
+        return rule
+
+# =========================
+# robots.txt (optional; on-disk cache with TTL + revalidation, compiled matcher)
+# =========================
+ROBOTS_AGENT = "refineryplanet"   # product token we answer to besides '*'
+ROBOTS_MAX_BYTES = 512 * 1024     # RFC 9309: parse at least the first 500 KiB
+
+def parse_robots(txt: str) -> list[list]:
+    """[[allow, pattern], ...] from our own group if robots.txt has one, else from the '*' group."""
+    groups = {"*": [], ROBOTS_AGENT: []}
+    present = set()
+    agents, in_rules = [], False
+    for raw in txt.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        key, val = line.split(":", 1)
+        key, val = key.strip().lower(), val.strip()
+        if key == "user-agent":
+            if in_rules:  # a User-agent after rules starts a new group
+                agents, in_rules = [], False
+            ua = val.lower()
+            agents.append(ua)
+            if ua == "*":
+                present.add("*")
+            elif ROBOTS_AGENT in ua:
+                present.add(ROBOTS_AGENT)
+        elif key in ("allow", "disallow"):
+            in_rules = True
+            if not val:
+                continue  # empty Disallow = allow everything
+            for ua in agents:
+                if ua == "*":
+                    groups["*"].append([key == "allow", val])
+                elif ROBOTS_AGENT in ua:
+                    groups[ROBOTS_AGENT].append([key == "allow", val])
+    return groups[ROBOTS_AGENT] if ROBOTS_AGENT in present else groups["*"]
+
+def compile_robots(rules: list) -> list:
+    """
+    (length, allow, regex) sorted so the first match is the decision: longest pattern wins,
+    Allow beats Disallow on ties. '*' matches any run of characters, a trailing '$' anchors.
+    """
+    compiled = []
+    for allow, pat in rules:
+        anchored = pat.endswith("$")
+        body = re.escape(pat[:-1] if anchored else pat).replace(r"\*", ".*")
+        compiled.append((len(pat), bool(allow), re.compile(body + ("$" if anchored else ""))))
+    compiled.sort(key=lambda r: (-r[0], not r[1]))
+    return compiled
+
+# =========================
+# Persistent state files (layer1/cache/*.json)
+# =========================
+def _load_state(path: pathlib.Path) -> dict:
+    """A cache file's JSON object; {} when it is missing, unreadable or not an object."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def _save_state(path: pathlib.Path, obj: dict):
+    """Write obj as JSON via a temp file + replace, so readers never see a torn file."""
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(obj, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(path)
+
+class RobotsCache:
+    """
+    {host: {rules, status, etag, last_modified, checked_at}} persisted in layer1/cache/robots.json;
+    rules are compiled once per host per run. open_url is the owning Fetcher's client.
+    """
+
+    def __init__(self, path: pathlib.Path, config: FetchConfig, open_url):
+        self.path = path
+        self._config = config
+        self._open_url = open_url
+        self._lock = threading.Lock()
+        self._pending = {}    # host -> Future of the startup prefetch
+        self._compiled = {}   # host -> compiled rules for this run
+        self._entries = _load_state(path)
+
+    def fetch(self, scheme: str, host: str) -> dict:
+        """Cached entry while fresh (robots_ttl_sec); otherwise revalidate/refetch, keeping stale rules on errors."""
+        host = host.lower()
+        cfg = self._config.domain(host)
+        ttl = float(cfg.get("robots_ttl_sec", DEFAULTS["robots_ttl_sec"]))
+        with self._lock:
+            entry = self._entries.get(host)
+        now = time.time()
+        if entry and now - float(entry.get("checked_at", 0)) < ttl:
+            return entry
+
+        url = f"{scheme}://{host}/robots.txt"
+        headers = {"User-Agent": random.choice(UAS), "Accept": "text/plain,*/*;q=0.8"}
+        headers.update(conditional_headers(entry))
+        req = urllib.request.Request(url, headers=headers)
+        timeout_sec = float(cfg.get("timeout_sec", DEFAULTS["timeout_sec"]))
+        keep_alive = bool(cfg.get("keep_alive", DEFAULTS["keep_alive"]))
+        fresh = None
         try:
-            if path.startswith(pref):
-                return False
+            try:
+                opened = self._open_url(req, headers, timeout_sec, keep_alive)
+            except urllib.error.HTTPError as e:
+                if e.code != 304:
+                    raise
+                opened = e
+            with opened as r:
+                status = r.getcode() or 200
+                if status == 304 and entry:
+                    fresh = dict(entry, checked_at=now)
+                else:
+                    txt = r.read(ROBOTS_MAX_BYTES).decode("utf-8", errors="ignore")
+                    fresh = {
+                        "rules": parse_robots(txt),
+                        "status": status,
+                        "etag": r.headers.get("ETag"),
+                        "last_modified": r.headers.get("Last-Modified"),
+                        "checked_at": now,
+                    }
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500:
+                fresh = {"rules": [], "status": e.code, "checked_at": now}  # no robots.txt: everything allowed
         except Exception:
-            continue
-    return True
+            pass
+        if fresh is None:
+            # unreachable / 5xx: keep the last known rules (allow-all when we never had any); retry next run
+            return entry or {"rules": []}
+        with self._lock:
+            self._entries[host] = fresh
+        return fresh
+
+    def rules(self, host: str, scheme: str = "https") -> list:
+        host = host.lower()
+        with self._lock:
+            compiled = self._compiled.get(host)
+            pending = self._pending.get(host)
+        if compiled is not None:
+            return compiled
+        entry = pending.result() if pending is not None else self.fetch(scheme, host)
+        compiled = compile_robots(entry.get("rules") or [])
+        with self._lock:
+            self._compiled[host] = compiled
+        return compiled
+
+    def allowed(self, host: str, path: str, scheme: str = "https") -> bool:
+        """path should include ?query; the longest matching Allow/Disallow decides (no match = allowed)."""
+        for _, allow, rx in self.rules(host, scheme):
+            if rx.match(path):
+                return allow
+        return True
+
+    def prefetch(self, urls, executor):
+        """Start robots.txt fetches for every host that respects robots, so they overlap instead of running inline."""
+        for u in urls:
+            p = urlparse(u)
+            host = p.netloc.lower()
+            if host in self._pending or not self._config.domain(host).get("respect_robots", DEFAULTS["respect_robots"]):
+                continue
+            self._pending[host] = executor.submit(self.fetch, p.scheme or "https", host)
+
+    def save(self):
+        with self._lock:
+            _save_state(self.path, self._entries)
 
 # =========================
 # Helpers
 # =========================
-def jitter_sleep(jmin, jmax):
-    time.sleep(random.uniform(max(0.0, jmin), max(jmin, jmax)))
+def jitter_delay(jmin, jmax):
+    return random.uniform(max(0.0, jmin), max(jmin, jmax))
 
 def backoff_sleep(attempt, base, cap):
     delay = min(cap, base * (2 ** (attempt - 1)))
@@ -210,7 +491,7 @@ def wants_json_for(url: str) -> bool:
         "asmx" in u or "utilservice.asmx" in u
     )
 
-def make_request(url: str, ua: str, per_domain_headers: dict | None = None):
+def make_request(url: str, ua: str, per_domain_headers: dict | None = None, keep_alive: bool = False):
     # JSON-first for API-ish endpoints; HTML-first otherwise
     if wants_json_for(url):
         accept = "application/json, text/plain, */*"
@@ -221,9 +502,9 @@ def make_request(url: str, ua: str, per_domain_headers: dict | None = None):
         "User-Agent": ua,
         "Accept": accept,
         "Accept-Language": "en-US,en;q=0.9",
-        "Accept-Encoding": "gzip, deflate",
+        "Accept-Encoding": ACCEPT_ENCODING,
         "Referer": url,
-        "Connection": "close",
+        "Connection": "keep-alive" if keep_alive else "close",
         "Cache-Control": "no-cache",
         "Pragma": "no-cache",
     }
@@ -236,56 +517,800 @@ def make_request(url: str, ua: str, per_domain_headers: dict | None = None):
 
     return urllib.request.Request(url, headers=headers), headers
 
-def decode_body(resp, raw: bytes):
-    if resp.headers.get("Content-Encoding", "").lower() == "gzip":
+class BodyTooLarge(Exception):
+    """Decoded body exceeded max_body_bytes; not worth retrying."""
+
+ACCEPT_ENCODING = "gzip, deflate, br" if _brotli is not None else "gzip, deflate"
+
+def _zlib_wrapped(head: bytes) -> bool:
+    """RFC 1950 header check: CM=8 and (CMF*256 + FLG) % 31 == 0."""
+    return len(head) >= 2 and (head[0] & 0x0F) == 8 and ((head[0] << 8) | head[1]) % 31 == 0
+
+class _DeflateDecoder:
+    """
+    'deflate' should be zlib-wrapped, but plenty of servers send raw RFC 1951; pick on the first bytes.
+    flush() raises zlib.error when the stream never reached its end.
+    """
+
+    def __init__(self):
+        self._d = None
+        self._buf = b""
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._d is None:
+            self._buf += data
+            if len(self._buf) < 2:
+                return b""
+            self._d = zlib.decompressobj(zlib.MAX_WBITS if _zlib_wrapped(self._buf) else -zlib.MAX_WBITS)
+            data, self._buf = self._buf, b""
+        return self._d.decompress(data)
+
+    def flush(self) -> bytes:
+        if self._d is None:
+            if not self._buf:
+                return b""
+            self._d = zlib.decompressobj(-zlib.MAX_WBITS)
+            data, self._buf = self._buf, b""
+            out = self._d.decompress(data) + self._d.flush()
+        else:
+            out = self._d.flush()
+        if not self._d.eof:
+            raise zlib.error("incomplete deflate stream (body cut off)")
+        return out
+
+class _GzipDecoder:
+    """
+    gzip; a multi-member body decodes member after member (zero padding skipped), as GzipFile does.
+    flush() raises zlib.error on a stream cut off mid-member, so the fetch is retried instead of saved.
+    """
+
+    def __init__(self):
+        self._d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decompress(self, data: bytes) -> bytes:
+        out = []
+        while data:
+            if self._d.eof:
+                data = data.lstrip(b"\x00")
+                if not data:
+                    break
+                self._d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            out.append(self._d.decompress(data))
+            data = self._d.unused_data if self._d.eof else b""
+        return b"".join(out)
+
+    def flush(self) -> bytes:
+        out = self._d.flush()
+        if not self._d.eof or self._d.unconsumed_tail:
+            raise zlib.error("incomplete gzip stream (body cut off)")
+        return out
+
+class _BrotliDecoder:
+    def __init__(self):
+        self._d = _brotli.Decompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._d.process(data) if data else b""
+
+    def flush(self) -> bytes:
+        return b""
+
+def _content_decoder(enc: str):
+    """Decoder for one Content-Encoding token; None for identity; KeyError if we can't decode it."""
+    if enc in ("", "identity"):
+        return None
+    if enc in ("gzip", "x-gzip"):
+        return _GzipDecoder()
+    if enc == "deflate":
+        return _DeflateDecoder()
+    if enc == "br" and _brotli is not None:
+        return _BrotliDecoder()
+    raise KeyError(enc)
+
+class StreamDecoder:
+    """
+    Incremental Content-Encoding decoder (gzip, deflate, br when available; stacked
+    encodings like "gzip, br" are undone last-applied first). If the first bytes don't
+    decode, the header was wrong and the raw stream is passed through unchanged. If we
+    have no decoder for a token, the raw stream is kept and `undecoded` names the
+    encoding so readers can skip the body.
+    """
+
+    def __init__(self, encoding: str | None):
+        self.undecoded = None
+        self._chain = []
+        self._pending = b""  # raw bytes held until output starts, for the passthrough fallback
+        self._started = False
+        tokens = [t.strip().lower() for t in (encoding or "").split(",") if t.strip()]
         try:
-            return gzip.GzipFile(fileobj=io.BytesIO(raw)).read()
+            for tok in reversed(tokens):
+                d = _content_decoder(tok)
+                if d is not None:
+                    self._chain.append(d)
+        except KeyError:
+            self._chain = []
+            self.undecoded = ", ".join(tokens)
+
+    def _passthrough(self, chunk: bytes) -> bytes:
+        raw, self._pending = self._pending + chunk, b""
+        self._chain = []
+        return raw
+
+    def feed(self, chunk: bytes) -> bytes:
+        if not self._chain:
+            return chunk
+        try:
+            out = chunk
+            for d in self._chain:
+                out = d.decompress(out)
         except Exception:
-            return raw
-    return raw
+            if self._started:
+                raise
+            return self._passthrough(chunk)  # mislabeled Content-Encoding; body is likely plain
+        if out:
+            self._started = True
+            self._pending = b""
+        elif not self._started:
+            self._pending += chunk
+        return out
+
+    def flush(self) -> bytes:
+        out = b""
+        try:
+            for d in self._chain:
+                out = (d.decompress(out) if out else b"") + d.flush()
+        except Exception:
+            if self._started:
+                raise
+            return self._passthrough(b"")
+        return out
+
+def stream_body(resp, part: pathlib.Path, max_bytes: int, on_data=None,
+                codec: str | None = None) -> tuple[str, int, bytes, str | None, str | None]:
+    """
+    Read resp in CHUNK_SIZE pieces, decode on the fly, and hash + write each decoded
+    piece as it arrives (also handed to on_data, e.g. the link collector). With codec the
+    part file is compressed as it is written (not for bodies we could not decode). Returns
+    (sha256 hex, decoded size, decoded prefix for sniffing, Content-Encoding left undecoded or None,
+    codec the part file was written with).
+    """
+    clen = resp.headers.get("Content-Length") or ""
+    if max_bytes and clen.isdigit() and int(clen) > max_bytes:
+        raise BodyTooLarge(f"Content-Length {clen} > max_body_bytes {max_bytes}")
+
+    decoder = StreamDecoder(resp.headers.get("Content-Encoding"))
+    if decoder.undecoded:
+        codec = None  # still-encoded bytes don't compress
+    h = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        with at_rest.open_write(part, codec) as w:
+            def emit(data: bytes):
+                nonlocal size, head
+                if not data:
+                    return
+                size += len(data)
+                if max_bytes and size > max_bytes:
+                    raise BodyTooLarge(f"body > max_body_bytes {max_bytes}")
+                if len(head) < SNIFF_BYTES:
+                    head += data[:SNIFF_BYTES - len(head)]
+                h.update(data)
+                w.write(data)
+                if on_data is not None:
+                    on_data(data)
+
+            while True:
+                chunk = resp.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                emit(decoder.feed(chunk))
+            emit(decoder.flush())
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    return h.hexdigest(), size, head, decoder.undecoded, codec
+
+# =========================
+# Conditional GET validator cache (persistent across runs)
+# =========================
+class ValidatorCache:
+    """{url: {etag, last_modified, path, sha256, content_type, final_url, fetched_at}} from the last good fetch."""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = _load_state(path)
+
+    def validators(self, url: str) -> dict | None:
+        """Validators for url, only if the body they describe is still on disk."""
+        with self._lock:
+            v = self._entries.get(url)
+        if not v or not (v.get("etag") or v.get("last_modified")):
+            return None
+        if not v.get("path") or not pathlib.Path(v["path"]).is_file():
+            return None
+        return v
+
+    def previous_body(self, url: str) -> dict | None:
+        """Last good fetch of url (validators or not), if its body is still on disk."""
+        with self._lock:
+            v = self._entries.get(url)
+        if not v or not v.get("path") or not pathlib.Path(v["path"]).is_file():
+            return None
+        return v
+
+    def remember(self, url: str, meta: dict, path_fp: pathlib.Path, prev: dict | None = None):
+        hdrs = meta.get("headers") or {}
+        etag = hdrs.get("etag") or (prev or {}).get("etag")
+        last_modified = hdrs.get("last-modified") or (prev or {}).get("last_modified")
+        with self._lock:
+            self._entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "path": str(path_fp),
+                "body_file": meta.get("body_file"),
+                "sha256": meta.get("sha256"),
+                "content_type": meta.get("content_type"),
+                "final_url": meta.get("final_url"),
+                "fetched_at": meta.get("fetched_at"),
+                "bytes": meta.get("bytes"),
+            }
+
+    def save(self):
+        with self._lock:
+            _save_state(self.path, self._entries)
+
+def conditional_headers(v: dict | None) -> dict:
+    h = {}
+    if v and v.get("etag"):
+        h["If-None-Match"] = v["etag"]
+    if v and v.get("last_modified"):
+        h["If-Modified-Since"] = v["last_modified"]
+    return h
+
+# =========================
+# Adaptive per-host pacing (learned across runs)
+# =========================
+THROTTLE_CODES = (429, 503)
+
+def parse_retry_after(value) -> float | None:
+    """Retry-After as seconds from now: delta-seconds or an HTTP-date."""
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+class RateController:
+    """
+    Per-host token bucket (one token, refilled every `delay` seconds) with AIMD on the delay:
+    - 429/503, connection errors, or latency (time to response headers) well above the host's norm
+      → delay doubles (up to max_delay)
+    - healthy responses → delay shrinks by speedup_step, down to min_delay (per_host_delay when unset)
+    - Retry-After holds the host until that time, even into the next run (the scheduler requeues
+      the throttled URL behind the hold rather than sleeping on a worker)
+    Learned delay / latency EWMA / hold persist in layer1/cache/rate_state.json.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = _load_state(path)
+
+    @staticmethod
+    def _bounds(cfg: dict) -> tuple[float, float]:
+        floor = cfg.get("min_delay")
+        if floor is None:
+            floor = cfg.get("per_host_delay", DEFAULTS["per_host_delay"])
+        floor = max(0.0, float(floor))
+        return floor, max(floor, float(cfg.get("max_delay", DEFAULTS["max_delay"])))
+
+    def _get(self, host: str, cfg: dict) -> dict:
+        floor, ceil = self._bounds(cfg)
+        st = self._state.setdefault(host.lower(), {})
+        st["delay"] = min(ceil, max(floor, float(st.get("delay", floor))))
+        return st
+
+    def observe(self, host: str, cfg: dict, status: int | None, latency: float | None,
+                retry_after: float | None = None):
+        """Feed one attempt's outcome (status None = connection/timeout error)."""
+        floor, ceil = self._bounds(cfg)
+        with self._lock:
+            st = self._get(host, cfg)
+            ewma = st.get("latency_ewma")
+            slow = (
+                latency is not None and ewma is not None
+                and latency > max(float(cfg.get("latency_slow_sec", DEFAULTS["latency_slow_sec"])),
+                                  ewma * float(cfg.get("latency_factor", DEFAULTS["latency_factor"])))
+            )
+            if status is None or status in THROTTLE_CODES or slow:
+                st["delay"] = min(ceil, max(st["delay"], 0.1) * 2)
+            elif status < 400:
+                st["delay"] = max(floor, st["delay"] - float(cfg.get("speedup_step", DEFAULTS["speedup_step"])))
+            if latency is not None and status is not None and status < 500:
+                st["latency_ewma"] = round(latency if ewma is None else 0.8 * ewma + 0.2 * latency, 3)
+            if retry_after:
+                st["hold_until"] = max(float(st.get("hold_until", 0.0)), time.time() + retry_after)
+            st["delay"] = round(st["delay"], 3)
+            st["updated"] = datetime.datetime.utcnow().isoformat() + "Z"
+
+    def delay(self, host: str, cfg: dict) -> float:
+        with self._lock:
+            return self._get(host, cfg)["delay"]
+
+    def hold_until(self, host: str) -> float:
+        with self._lock:
+            return float(self._state.get(host.lower(), {}).get("hold_until", 0.0))
+
+    def host_stats(self, host: str) -> dict:
+        with self._lock:
+            st = self._state.get(host.lower(), {})
+            out = {"delay": st.get("delay"), "latency_ewma": st.get("latency_ewma"), "hold_until": None}
+            if float(st.get("hold_until", 0.0)) > time.time():
+                out["hold_until"] = datetime.datetime.utcfromtimestamp(st["hold_until"]).isoformat() + "Z"
+            return out
 
-def sha256_bytes(b: bytes) -> str:
+    def save(self):
+        with self._lock:
+            _save_state(self.path, self._state)
+
+# =========================
+# Per-host circuit breaker (persisted across runs)
+# =========================
+class CircuitBreaker:
+    """
+    closed → open after breaker_threshold consecutive failed attempts (connection errors / 5xx);
+    open → half_open once breaker_cooldown_sec has passed; half_open lets one request through:
+    success (2xx / 3xx / 304) closes the circuit, failure re-opens it for another cool-down.
+    4xx responses are not recorded: they neither add to the failure count nor reset it.
+    State lives in layer1/cache/breakers.json.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = _load_state(path)
+
+    def _state_of(self, st: dict) -> str:
+        until = float(st.get("open_until", 0.0))
+        if not until:
+            return "closed"
+        return "open" if until > time.time() else "half_open"
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            return self._state_of(self._state.get(host.lower(), {})) == "open"
+
+    def record(self, host: str, cfg: dict, failed: bool) -> bool:
+        """Count one attempt's outcome (failed=False only for 2xx/3xx/304); returns True when this failure opened the circuit."""
+        threshold = int(cfg.get("breaker_threshold", DEFAULTS["breaker_threshold"]) or 0)
+        cooldown = float(cfg.get("breaker_cooldown_sec", DEFAULTS["breaker_cooldown_sec"]) or 0)
+        with self._lock:
+            st = self._state.setdefault(host.lower(), {})
+            if not failed:
+                st.update({"failures": 0, "open_until": 0.0})
+                return False
+            st["failures"] = int(st.get("failures", 0)) + 1
+            st["last_failure"] = datetime.datetime.utcnow().isoformat() + "Z"
+            if threshold <= 0 or cooldown <= 0 or self._state_of(st) == "open":
+                return False
+            if self._state_of(st) == "half_open" or st["failures"] >= threshold:
+                st["open_until"] = time.time() + cooldown
+                st["trips"] = int(st.get("trips", 0)) + 1
+                return True
+            return False
+
+    def host_stats(self, host: str) -> dict:
+        with self._lock:
+            st = self._state.get(host.lower(), {})
+            out = {"breaker": self._state_of(st), "consecutive_failures": int(st.get("failures", 0)),
+                   "breaker_open_until": None}
+            if out["breaker"] == "open":
+                out["breaker_open_until"] = datetime.datetime.utcfromtimestamp(st["open_until"]).isoformat() + "Z"
+            return out
+
+    def save(self):
+        with self._lock:
+            # closed hosts with no failures carry no information
+            keep = {h: st for h, st in self._state.items() if st.get("failures") or st.get("open_until")}
+            _save_state(self.path, keep)
+
+# =========================
+# Content-addressed body store
+# =========================
+def commit_blob(blobs_dir: pathlib.Path, part: pathlib.Path, digest: str, codec: str | None = None) -> pathlib.Path:
+    """
+    Move a fully written temp file to layer1/blobs/<sha256>[.gz|.zst]; identical bodies from any run
+    share one file (whichever stored form got there first).
+    """
+    p = at_rest.resolve(blobs_dir / digest)
+    if p is not None:
+        part.unlink(missing_ok=True)
+        return p
+    p = at_rest.stored_path(blobs_dir / digest, codec)
+    part.replace(p)
+    return p
+
+def adopt_blob(blobs_dir: pathlib.Path, src: pathlib.Path, digest: str) -> pathlib.Path:
+    """Make sure an existing body file (e.g. from an older files-mode run) is in the blob store."""
+    p = at_rest.resolve(blobs_dir / digest)
+    if p is None:
+        part = blobs_dir / f".{digest}.{threading.get_ident()}.part"
+        shutil.copyfile(src, part)
+        p = commit_blob(blobs_dir, part, digest, at_rest.codec_of(src.name))
+    return p
+
+def sha256_file(p: pathlib.Path) -> str:
+    """sha256 of the content (decompressed when stored compressed)."""
     h = hashlib.sha256()
-    h.update(b)
+    with at_rest.open_read(p) as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
     return h.hexdigest()
 
-def sniff_ext(ct: str, body: bytes) -> str:
+def sniff_ext(ct: str, head: bytes) -> str:
     """Return extension based on CT with a light sniff fallback."""
     ct = (ct or "").lower()
     if ct in CT_EXT:
         return CT_EXT[ct]
-    b = body.lstrip()[:1]
+    b = head.lstrip()[:1]
     if b in (b"{", b"["):
         return ".json"
-    if body.lstrip()[:1] == b"<":
+    if head.lstrip()[:1] == b"<":
         return ".html"
     return ".bin"
 
+# =========================
+# DNS cache (all connections resolve through it)
+# =========================
+class DNSCache:
+    """
+    getaddrinfo results per (host, port) for dns_ttl_sec. Concurrent lookups of the same key
+    wait for the first one. Time spent resolving is tracked per thread so fetch_one can
+    report it for the attempt it just made.
+    """
+
+    def __init__(self, ttl_sec: float):
+        self.ttl_sec = float(ttl_sec)
+        self._entries = {}    # (host, port) -> (addrinfos, expires_at)
+        self._lookup = {}     # host -> seconds the last real lookup took
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def resolve(self, host: str, port: int) -> list:
+        key = (host.lower(), int(port))
+        t0 = time.monotonic()
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                hit = self._entries.get(key)
+            if hit and hit[1] > time.monotonic():
+                # includes any wait on a concurrent lookup of the same host
+                self._local.spent = getattr(self._local, "spent", 0.0) + (time.monotonic() - t0)
+                return hit[0]
+            infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+            spent = time.monotonic() - t0
+            self._local.spent = getattr(self._local, "spent", 0.0) + spent
+            with self._lock:
+                self._entries[key] = (infos, time.monotonic() + self.ttl_sec)
+                self._lookup[key[0]] = round(spent, 4)
+            return infos
+
+    def create_connection(self, address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None):
+        """socket.create_connection() over cached addresses (drop-in for HTTPConnection._create_connection)."""
+        host, port = address
+        err = None
+        for *_, sa in self.resolve(host, port):
+            try:
+                return socket.create_connection(sa[:2], timeout, source_address)
+            except OSError as e:
+                err = e
+        raise err or OSError(f"no addresses for {host}")
+
+    def prefetch(self, urls, executor):
+        """Pre-resolve every distinct host:port in urls on the executor (fire and forget)."""
+        seen = set()
+        for u in urls:
+            p = urlparse(u)
+            if not p.hostname:
+                continue
+            key = (p.hostname.lower(), p.port or (443 if p.scheme == "https" else 80))
+            if key not in seen:
+                seen.add(key)
+                executor.submit(self._quiet_resolve, *key)
+
+    def _quiet_resolve(self, host, port):
+        try:
+            self.resolve(host, port)
+        except OSError:
+            pass  # the real fetch will retry and report it
+
+    def reset_spent(self):
+        self._local.spent = 0.0
+
+    def spent(self) -> float:
+        return round(getattr(self._local, "spent", 0.0), 4)
+
+    def lookup_sec(self, host: str) -> float | None:
+        with self._lock:
+            return self._lookup.get((urlparse(f"//{host}").hostname or host).lower())
+
+    def http_connection(self, host: str, **kwargs) -> http.client.HTTPConnection:
+        """HTTPConnection whose sockets resolve through this cache (urllib do_open() / pool factory)."""
+        conn = http.client.HTTPConnection(host, **kwargs)
+        conn._create_connection = self.create_connection
+        return conn
+
+    def https_connection(self, host: str, **kwargs) -> http.client.HTTPSConnection:
+        conn = http.client.HTTPSConnection(host, **kwargs)
+        conn._create_connection = self.create_connection
+        return conn
+
+    def opener(self) -> urllib.request.OpenerDirector:
+        """urlopen() equivalent (proxies, redirects, HTTPError) whose connections resolve through this cache."""
+        return urllib.request.build_opener(_CachedDNSHTTPHandler(self), _CachedDNSHTTPSHandler(self))
+
+class _CachedDNSHTTPHandler(urllib.request.HTTPHandler):
+    def __init__(self, dns: DNSCache):
+        super().__init__()
+        self._dns = dns
+
+    def http_open(self, req):
+        return self.do_open(self._dns.http_connection, req)
+
+class _CachedDNSHTTPSHandler(urllib.request.HTTPSHandler):
+    def __init__(self, dns: DNSCache):
+        super().__init__()
+        self._dns = dns
+
+    def https_open(self, req):
+        return self.do_open(self._dns.https_connection, req, context=self._context)
+
+# =========================
+# Keep-alive connection pool (per scheme+host)
+# =========================
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+class ConnectionPool:
+    """
+    Idle keep-alive connections per (scheme, netloc), with idle-time and per-host size limits.
+    New connections resolve through `dns` (a DNSCache) when given.
+    """
+
+    def __init__(self, idle_sec: float, max_per_host: int, dns: DNSCache | None = None):
+        self.idle_sec = float(idle_sec)
+        self.max_per_host = max(0, int(max_per_host))
+        self.dns = dns
+        self._idle = {}   # (scheme, netloc) -> deque[(conn, last_used)]
+        self._stats = {}  # netloc -> {"conn_new": n, "conn_reused": n}
+        self._lock = threading.Lock()
+        self._ssl = ssl.create_default_context()
+
+    def _count(self, netloc: str, key: str):
+        st = self._stats.setdefault(netloc, {"conn_new": 0, "conn_reused": 0})
+        st[key] += 1
+
+    def acquire(self, scheme: str, netloc: str, timeout: float, fresh: bool = False):
+        """Return (connection, reused). Expired idle connections are closed on the way."""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            while idle and not fresh:
+                conn, last_used = idle.pop()
+                if now - last_used > self.idle_sec:
+                    conn.close()
+                    continue
+                self._count(netloc, "conn_reused")
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            self._count(netloc, "conn_new")
+        if scheme == "https":
+            factory = self.dns.https_connection if self.dns else http.client.HTTPSConnection
+            return factory(netloc, timeout=timeout, context=self._ssl), False
+        factory = self.dns.http_connection if self.dns else http.client.HTTPConnection
+        return factory(netloc, timeout=timeout), False
+
+    def release(self, scheme: str, netloc: str, conn):
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), collections.deque())
+            if len(idle) >= self.max_per_host:
+                conn.close()
+                return
+            idle.append((conn, time.monotonic()))
+
+    def host_stats(self, netloc: str) -> dict:
+        with self._lock:
+            return dict(self._stats.get(netloc, {"conn_new": 0, "conn_reused": 0}))
+
+    def close_all(self):
+        with self._lock:
+            for idle in self._idle.values():
+                while idle:
+                    idle.pop()[0].close()
+            self._idle.clear()
+
+class PooledResponse:
+    """Minimal urlopen()-style response; hands the connection back to the pool on close."""
+
+    def __init__(self, pool: ConnectionPool, key: tuple, conn, resp, url: str):
+        self._pool, self._key, self._conn, self._resp = pool, key, conn, resp
+        self.headers = resp.msg
+        self.url = url
+
+    def getcode(self):
+        return self._resp.status
+
+    def info(self):
+        return self._resp.msg
+
+    def geturl(self):
+        return self.url
+
+    def read(self, amt=None):
+        return self._resp.read(amt)
+
+    def close(self):
+        # Only fully-drained responses on persistent connections are reusable
+        if not self._resp.isclosed() and self._resp.length == 0:
+            self._resp.read()  # bodiless (e.g. 304) — drain so the connection can go back
+        if self._resp.isclosed() and not self._resp.will_close:
+            self._pool.release(*self._key, self._conn)
+        else:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _pooled_get(pool: ConnectionPool, url: str, headers: dict, timeout: float):
+    u = urlparse(url)
+    target = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    fresh = False
+    while True:
+        conn, reused = pool.acquire(u.scheme, u.netloc, timeout, fresh=fresh)
+        try:
+            conn.request("GET", target, headers=headers)
+            return (u.scheme, u.netloc), conn, conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if not reused:
+                raise
+            fresh = True  # server dropped an idle connection; retry once on a new one
+        except Exception:
+            conn.close()
+            raise
+
+def _drain(resp, max_body_bytes: int) -> bytes:
+    """
+    Read a redirect / error body in CHUNK_SIZE pieces, at most max_body_bytes (+1 to detect overflow;
+    0 = no cap). An oversized body is left unread, so PooledResponse.close() drops the connection.
+    """
+    parts, size = [], 0
+    while True:
+        amt = CHUNK_SIZE if not max_body_bytes else min(CHUNK_SIZE, max_body_bytes + 1 - size)
+        if amt <= 0:
+            return b"".join(parts)[:max_body_bytes]
+        chunk = resp.read(amt)
+        if not chunk:
+            return b"".join(parts)
+        parts.append(chunk)
+        size += len(chunk)
+
+def pooled_urlopen(pool: ConnectionPool, url: str, headers: dict, timeout: float,
+                   max_body_bytes: int = 0) -> PooledResponse:
+    """GET via the keep-alive pool, following redirects; raises urllib.error.HTTPError/URLError like urlopen."""
+    for _ in range(MAX_REDIRECTS + 1):
+        try:
+            key, conn, resp = _pooled_get(pool, url, headers, timeout)
+        except (OSError, http.client.HTTPException) as e:
+            raise urllib.error.URLError(e) from e
+        location = resp.getheader("Location")
+        if resp.status in REDIRECT_CODES and location:
+            _drain(resp, max_body_bytes)
+            PooledResponse(pool, key, conn, resp, url).close()
+            url = urljoin(url, location)
+            continue
+        if resp.status >= 400:
+            body = _drain(resp, max_body_bytes)
+            PooledResponse(pool, key, conn, resp, url).close()
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.msg, io.BytesIO(body))
+        return PooledResponse(pool, key, conn, resp, url)
+    raise urllib.error.URLError(f"too many redirects: {url}")
+
 # ---------- Expansion helpers ----------
-HREF_RE = re.compile(r'href\s*=\s*["\']([^"\']+)["\']', re.I)
+HREF_RE = re.compile(rb'href\s*=\s*["\']([^"\']+)["\']', re.I)
+HREF_TAIL = 4096  # bytes carried between chunks so an href split across a boundary still matches
 
-def extract_links(base_url: str, html_bytes: bytes) -> list[str]:
-    try:
-        txt = html_bytes.decode("utf-8", errors="ignore")
-    except Exception:
-        return []
-    links = []
-    for m in HREF_RE.finditer(txt):
-        href = m.group(1).strip()
-        if not href or href.startswith("#") or href.startswith("javascript:"):
+class HrefScanner:
+    """Incremental href scanner over HTML bytes; feed() lazily yields raw href values per chunk."""
+
+    def __init__(self):
+        self._buf = b""
+
+    def feed(self, chunk: bytes):
+        buf = self._buf + chunk
+        last = 0
+        for m in HREF_RE.finditer(buf):
+            yield m.group(1)
+            last = m.end()
+        self._buf = buf[max(last, len(buf) - HREF_TAIL):]
+
+def same_site_links(hrefs, base_url: str, host: str):
+    """
+    Yield absolute same-site links. Cheap byte-prefix checks drop fragments, javascript:,
+    mailto: and other-host links before paying for urljoin/urlparse.
+    """
+    host_b = host.lower().encode("ascii", "ignore")
+    for raw in hrefs:
+        href = raw.strip()
+        if not href or href[:1] == b"#":
+            continue
+        head = href[:len(host_b) + 9].lower()
+        if head.startswith(b"//"):
+            if not head[2:].startswith(host_b):
+                continue
+        elif b":" in href.split(b"/", 1)[0]:  # has a scheme
+            if not (head.startswith(b"http://" + host_b) or head.startswith(b"https://" + host_b)):
+                continue
+        link = urljoin(base_url, href.decode("utf-8", errors="ignore"))
+        if urlparse(link).netloc != host:  # exact check (ports, lookalike prefixes)
             continue
-        links.append(urljoin(base_url, href))
-    return links
-
-def allow_expand(host: str, url: str) -> bool:
-    rules = EXPAND.get(host) or EXPAND.get("www."+host) or EXPAND.get(host.split(".")[-2]+"."+host.split(".")[-1]) or {}
-    allow = rules.get("allow") or []
-    deny  = rules.get("deny") or []
-    if deny and any(re.search(p, url, re.I) for p in deny):
+        yield link
+
+class LinkCollector:
+    """
+    Expansion candidates gathered while the body streams in: scan → same-site → allow_expand.
+    Once `max_new` links not already in the frontier are collected, further chunks are ignored
+    (truncated=True). The scheduler still re-checks dedup and max_new on the main thread.
+    """
+
+    def __init__(self, base_url: str, host: str, rule: dict, is_new):
+        self.links: list[str] = []
+        self.done = rule["max_new"] <= 0
+        self.truncated = False
+        self._scanner = HrefScanner()
+        self._base_url, self._host, self._rule, self._is_new = base_url, host, rule, is_new
+
+    def feed(self, data: bytes):
+        if self.done:
+            return
+        for link in same_site_links(self._scanner.feed(data), self._base_url, self._host):
+            if link in self.links or not allow_expand(self._rule, link) or not self._is_new(link):
+                continue
+            self.links.append(link)
+            if len(self.links) >= self._rule["max_new"]:
+                self.done = self.truncated = True
+                return
+
+    def restart(self, is_new) -> "LinkCollector":
+        """A fresh collector for the same page, deduping against is_new."""
+        return LinkCollector(self._base_url, self._host, self._rule, is_new)
+
+def allow_expand(rule: dict, url: str) -> bool:
+    """deny wins over allow; rules are written against the path (^/api/…), query-aware ones see path?query."""
+    u = urlparse(url)
+    path = u.path or "/"
+    subjects = (path, f"{path}?{u.query}") if u.query else (path,)
+    if rule["deny"] is not None and any(rule["deny"].search(x) for x in subjects):
         return False
-    if allow:
-        return any(re.search(p, url, re.I) for p in allow)
-    return False
+    return rule["allow"] is not None and any(rule["allow"].search(x) for x in subjects)
 
 # =========================
 # Load targets (strip inline notes) — supports TARGETS/TARGETS_FILE env
@@ -306,253 +1331,857 @@ def load_targets(path_str: str) -> list[str]:
         urls.append(m.group(1).strip())
     return urls
 
-# Seed queue
-queue: list[str] = load_targets(TARGETS_FILE)
-if ENV_LIMIT and ENV_LIMIT > 0:
-    queue = queue[:ENV_LIMIT]
-seen_urls = set(queue)
+# =========================
+# Frontier (per-host queues + canonical-URL dedup)
+# =========================
+def canonical_url(url: str) -> str:
+    """Dedup key: lowercase scheme/host, no default port, no fragment, sorted query pairs."""
+    u = urlparse(url.strip())
+    scheme = u.scheme.lower()
+    host = (u.hostname or "").lower()
+    port = u.port
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+    query = "&".join(sorted(p for p in u.query.split("&") if p))
+    return f"{scheme}://{netloc}{u.path or '/'}" + (f";{u.params}" if u.params else "") + (f"?{query}" if query else "")
+
+def host_key(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+class Frontier:
+    """
+    Work queue: one FIFO deque per host plus a round-robin ring of hosts with pending work.
+    add() and pop are O(1) per URL (pop scans at most the ring of hosts). Indices follow
+    enqueue order; the scheduler queues expansion links in parent-index order (see Fetcher.run),
+    so source_NNN numbering matches a sequential run regardless of completion order.
+    """
+
+    def __init__(self, on_add=None):
+        self._on_add = on_add              # called as on_add(index, url) for every newly enqueued URL
+        self._queues = {}                  # host -> deque[(index, url)]
+        self._ring = collections.deque()   # hosts with pending URLs, in round-robin order
+        self._seen = set()                 # canonical URLs ever enqueued
+        self._len = 0
+        self.next_index = 1
+
+    def __len__(self):
+        return self._len
+
+    def add(self, url: str) -> int | None:
+        """Enqueue url unless already seen; returns its index (None for duplicates)."""
+        key = canonical_url(url)
+        if key in self._seen:
+            return None
+        index = self.next_index
+        self._enqueue(index, url)
+        if self._on_add is not None:
+            self._on_add(index, url)
+        return index
+
+    def restore(self, index: int, url: str, pending: bool):
+        """Re-seed from a journal: keep the original index; completed URLs are only marked seen."""
+        if pending:
+            self._enqueue(index, url)
+        else:
+            self._seen.add(canonical_url(url))
+        self.next_index = max(self.next_index, index + 1)
+
+    def _enqueue(self, index: int, url: str):
+        self._seen.add(canonical_url(url))
+        host = host_key(url)
+        q = self._queues.setdefault(host, collections.deque())
+        if not q:
+            self._ring.append(host)
+        q.append((index, url))
+        self.next_index = max(self.next_index, index + 1)
+        self._len += 1
 
-log(f"🔎 Fetch plan: {len(queue)} URLs (FAST={'on' if ENV_FAST else 'off'}; LIMIT={ENV_LIMIT or 'none'})")
-log(f"   • targets file: {TARGETS_FILE}")
+    def requeue(self, index: int, url: str):
+        """Put a popped URL back at the front of its host queue (keeps each queue in index order)."""
+        host = host_key(url)
+        q = self._queues.setdefault(host, collections.deque())
+        if not q:
+            self._ring.append(host)
+        q.appendleft((index, url))
+        self._len += 1
+
+    def hosts(self):
+        return list(self._ring)
+
+    def lowest_index(self) -> int | None:
+        """Smallest queued index (each host queue is in index order)."""
+        return min((q[0][0] for q in self._queues.values() if q), default=None)
+
+    def pending_urls(self) -> list[str]:
+        return [url for host in self._ring for _, url in self._queues[host]]
+
+    def is_new(self, url: str) -> bool:
+        return canonical_url(url) not in self._seen
+
+    def pop_ready(self, ready) -> tuple[int, str, str] | None:
+        """Next (index, url, host) from the first host in round-robin order for which ready(host)."""
+        for _ in range(len(self._ring)):
+            host = self._ring[0]
+            self._ring.rotate(-1)  # served (or skipped) hosts go to the back
+            if not ready(host):
+                continue
+            q = self._queues[host]
+            index, url = q.popleft()
+            self._len -= 1
+            if not q:
+                self._ring.pop()   # just rotated to the back
+            return index, url, host
+        return None
 
 # =========================
-# Graceful interrupt handling
+# Run journal (append-only NDJSON, one line per event, flushed per URL)
 # =========================
-def write_summary_and_exit(code=130):
-    try:
+def read_journal(path: pathlib.Path):
+    """Yield (offset, event); a torn last line (crash mid-write) is skipped."""
+    with open(path, "rb") as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            try:
+                yield offset, json.loads(line)
+            except ValueError:
+                continue
+
+class Journal:
+    """
+    {"event": "queued", "index", "url"} whenever the frontier accepts a URL;
+    {"event": "result", "rec": {...}} once per finished URL (a later result for the same index wins).
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        if path.is_file() and path.stat().st_size:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        else:
+            torn = False
+        self._f = open(path, "a", encoding="utf-8")
+        if torn:
+            self._f.write("\n")  # never glue new events onto a half-written line
+        self.done = 0  # result events written (this process)
+
+    def _write(self, event: dict):
+        self._f.write(json.dumps(event) + "\n")
+        self._f.flush()
+
+    def queued(self, index: int, url: str):
+        self._write({"event": "queued", "index": index, "url": url})
+
+    def result(self, rec: dict):
+        self._write({"event": "result", "rec": rec})
+        self.done += 1
+
+    def close(self):
+        self._f.close()
+
+def restore_frontier(path: pathlib.Path, frontier) -> int:
+    """
+    Rebuild the frontier from a journal. Completed = fetched OK, carried forward or disallowed by
+    robots; failures and circuit/Retry-After skips are queued again. Returns the number completed.
+    """
+    queued, completed = [], set()
+    for _, ev in read_journal(path):
+        if ev.get("event") == "queued":
+            queued.append((int(ev["index"]), ev["url"]))
+        elif ev.get("event") == "result":
+            rec = ev.get("rec") or {}
+            if rec.get("ok") or rec.get("carried_forward") or rec.get("reason") == "robots_disallow":
+                completed.add(rec.get("index"))
+            else:
+                completed.discard(rec.get("index"))
+    for index, url in queued:
+        frontier.restore(index, url, pending=index not in completed)
+    return len(completed)
+
+def apply_draw_schedule(urls: list[str], root: pathlib.Path = pathlib.Path(".")) -> tuple[list[str], dict]:
+    """
+    (urls in fetch order, {canonical url: reason} for targets with no new draw).
+    mode "skip" keeps the order and returns the not-due set; "defer" moves not-due targets last.
+    """
+    cal = draw_schedule.load_calendar(root / draw_schedule.CALENDAR_PATH)
+    if not cal["games"]:
+        return urls, {}
+    dates = draw_schedule.last_draw_dates(draw_schedule.latest_layer2_output(root / draw_schedule.L2_OUT))
+    plan = draw_schedule.plan(urls, cal, dates)
+    not_due = [p for p in plan if not p["due"]]
+    log(f"   • draw calendar: {len(plan) - len(not_due)} due, {len(not_due)} with no new draw (mode={cal['mode']})")
+    if cal["mode"] == "defer":
+        return [p["url"] for p in plan if p["due"]] + [p["url"] for p in not_due], {}
+    return urls, {canonical_url(p["url"]): p["reason"] for p in not_due}
+
+# =========================
+# Summary helpers
+# =========================
+def _json_block(obj, level: int) -> str:
+    """json.dumps(obj, indent=2) re-indented to sit `level` spaces deep inside a larger indent=2 document."""
+    return json.dumps(obj, indent=2).replace("\n", "\n" + " " * level)
+
+# =========================
+# Fetcher (one run: run dir + journal, frontier, cross-run caches)
+# =========================
+class Fetcher:
+    """
+    One Layer 1 run. Construction opens layer1/out/<run_id>/ and its journal and loads the
+    cross-run caches (validators, rate state, breakers, robots); run() seeds the frontier,
+    fetches until it is empty and returns the summary it wrote to l1_summary.json.
+    resume=True continues run_id from its journal (FileNotFoundError when there is none).
+    urls replaces the config's targets file as the seed list.
+    """
+
+    def __init__(self, config: FetchConfig, run_id: str | None = None, resume: bool = False,
+                 urls: list[str] | None = None):
+        self.config = config
+        self.resume = bool(resume)
+        self.run_id = run_id or datetime.datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        self.out_dir = config.out_root / self.run_id
+        self.journal_path = self.out_dir / "journal.ndjson"
+        if self.resume and not self.journal_path.is_file():
+            raise FileNotFoundError(f"cannot resume {self.run_id}: {self.journal_path} not found")
+        self._urls = urls
+        for d in (self.out_dir, config.logs_dir, config.cache_dir, config.blobs_dir):
+            d.mkdir(parents=True, exist_ok=True)
+
+        defaults = config.defaults
+        self.validators = ValidatorCache(config.cache_dir / "validators.json")
+        self.rate = RateController(config.cache_dir / "rate_state.json")
+        self.breaker = CircuitBreaker(config.cache_dir / "breakers.json")
+        self.robots = RobotsCache(config.cache_dir / "robots.json", config, self.open_url)
+        self.dns = DNSCache(defaults.get("dns_ttl_sec", DEFAULTS["dns_ttl_sec"]))
+        self.pool = ConnectionPool(
+            defaults.get("pool_idle_sec", DEFAULTS["pool_idle_sec"]),
+            defaults.get("pool_max_per_host", DEFAULTS["pool_max_per_host"]),
+            self.dns,
+        )
+        self.opener = self.dns.opener()
+
+        # Per-host connection / pacing / breaker stats (ok/fail/bytes come from the journal)
+        self.host_stats = {}
+        self.not_due = {}  # canonical url -> why the draw calendar says it can't have changed
+        self.already_done = 0
+        self.journal = Journal(self.journal_path)
+        self.frontier = Frontier(on_add=self.journal.queued)
+
+    # ---------- HTTP ----------
+    def open_url(self, req, headers: dict, timeout: float, keep_alive: bool, max_body_bytes: int = 0):
+        """Pooled keep-alive client when enabled (and no proxy is configured); plain urlopen otherwise."""
+        if keep_alive and not urllib.request.getproxies():
+            return pooled_urlopen(self.pool, req.full_url, headers, timeout, max_body_bytes)
+        return self.opener.open(req, timeout=timeout)
+
+    # ---------- Bodies ----------
+    def reuse_body(self, index: int, prev: dict) -> tuple[str, pathlib.Path, str, int]:
+        """(fname, path, sha256, size) for this run's source_NNN backed by a previous fetch's body."""
+        fname = f"source_{index:03d}{pathlib.Path(prev.get('body_file') or prev['path']).suffix}"
+        prev_fp = pathlib.Path(prev["path"])
+        digest = prev.get("sha256") or sha256_file(prev_fp)
+        if self.config.use_blobs:
+            path_fp = adopt_blob(self.config.blobs_dir, prev_fp, digest)
+        else:
+            path_fp = self.link_previous_body(prev, fname)
+        size = prev.get("bytes")
+        if size is None:
+            size = at_rest.decoded_size(path_fp)
+        return fname, path_fp, digest, size
+
+    def link_previous_body(self, prev: dict, fname: str) -> pathlib.Path:
+        """Point this run's source_NNN at the previous run's body (hardlink; copy if links unsupported)."""
+        src = pathlib.Path(prev["path"])
+        dst = at_rest.stored_path(self.out_dir / fname, at_rest.codec_of(src.name))
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
+        return dst
+
+    # ---------- Frontier seeding ----------
+    def _seed(self) -> list[str]:
+        """Restore (resume) or seed the frontier; returns the URLs to pre-resolve / prefetch robots for."""
+        if self.resume:
+            self.already_done = restore_frontier(self.journal_path, self.frontier)
+            log(f"♻️  Resuming {self.run_id}: {self.already_done} URLs already done, {len(self.frontier)} left")
+            return self.frontier.pending_urls()
+        cfg = self.config
+        seed_urls = list(self._urls) if self._urls is not None else load_targets(str(cfg.targets_path))
+        if cfg.limit and cfg.limit > 0:
+            seed_urls = seed_urls[:cfg.limit]
+        if cfg.schedule:
+            seed_urls, self.not_due = apply_draw_schedule(seed_urls, cfg.root)
+        for u in seed_urls:
+            self.frontier.add(u)
+        return seed_urls
+
+    # =========================
+    # Summary (streamed from the journal)
+    # =========================
+    def write_summary(self, interrupted: bool = False) -> dict:
+        """
+        Two streaming passes over the journal: (1) latest result offset per index + counters,
+        (2) write l1_summary.json with records in index order, read back one line at a time.
+        Output matches json.dumps({"summary", "fetched"}, indent=2).
+        """
+        self.validators.save()
+        self.rate.save()
+        self.breaker.save()
+        self.robots.save()
+
+        # ok = a real 2xx / 304 response; carried-forward records (no request) count separately
+        latest = {}  # index -> (offset, ok, skipped, not_modified, host, bytes, carried_forward)
+        for offset, ev in read_journal(self.journal_path):
+            if ev.get("event") != "result":
+                continue
+            rec = ev.get("rec") or {}
+            carried = bool(rec.get("carried_forward"))
+            latest[rec.get("index", 0)] = (
+                offset, bool(rec.get("ok")), bool(rec.get("skipped")) and not carried, bool(rec.get("not_modified")),
+                (rec.get("host") or "").lower(), rec.get("bytes", 0) or 0, carried,
+            )
+
+        hosts = {}
+        for index in sorted(latest):
+            _, ok, skipped, _, host, size, carried = latest[index]
+            hs = hosts.setdefault(host, {"ok": 0, "fail": 0, "bytes": 0})
+            if carried:
+                hs["carried_forward"] = hs.get("carried_forward", 0) + 1
+            elif skipped:
+                hs["skipped"] = hs.get("skipped", 0) + 1
+            elif ok:
+                hs["ok"] += 1
+                hs["bytes"] += size
+            else:
+                hs["fail"] += 1
+        for host, extra in self.host_stats.items():
+            hosts.setdefault(host, {"ok": 0, "fail": 0, "bytes": 0}).update(extra)
+
         summary = {
-            "run_id": RUN_ID,
-            "count": len(RESULTS),
-            "ok": sum(1 for r in RESULTS if r.get("ok")),
-            "skipped": sum(1 for r in RESULTS if r.get("skipped")),
+            "run_id": self.run_id,
+            "count": len(latest),
+            "ok": sum(1 for v in latest.values() if v[1]),
+            "skipped": sum(1 for v in latest.values() if v[2]),
+            "not_modified": sum(1 for v in latest.values() if v[3]),
+            "carried_forward": sum(1 for v in latest.values() if v[6]),
             "ts": datetime.datetime.utcnow().isoformat() + "Z",
-            "out_dir": str(OUT_DIR),
-            "hosts": HOST_STATS,
-            "defaults": PACING.get("defaults", DEFAULTS),
-            "interrupted": True,
-            "targets_file": TARGETS_FILE,
-            "expand_rules": list(EXPAND.keys()),
+            "out_dir": str(self.out_dir),
+            "hosts": hosts,
+            "defaults": self.config.pacing.get("defaults", DEFAULTS),
+            "targets_file": self.config.targets_file,
+            "expand_rules": list(self.config.expand.keys()),
         }
-        (OUT_DIR / "l1_summary.json").write_text(
-            json.dumps({"summary": summary, "fetched": RESULTS}, indent=2),
-            encoding="utf-8",
-        )
-    finally:
-        sys.exit(code)
-
-def _sigint_handler(signum, frame):
-    log("⏹  Received Ctrl+C — writing partial summary and exiting…")
-    write_summary_and_exit(130)
-
-signal.signal(signal.SIGINT, _sigint_handler)
-
-# =========================
-# Main loop (queue supports optional depth-1 expansion)
-# =========================
-last_hit = {}  # host -> last timestamp
-index = 0
-
-while queue:
-    url = queue.pop(0)
-    index += 1
-
-    parsed = urlparse(url)
-    host = parsed.netloc
-    path = parsed.path or "/"
-
-    cfg = domain_cfg(host)
-    per_host_delay = float(cfg.get("per_host_delay", DEFAULTS["per_host_delay"]))
-    jmin = float(cfg.get("jitter_min", DEFAULTS["jitter_min"]))
-    jmax = float(cfg.get("jitter_max", DEFAULTS["jitter_max"]))
-    timeout_sec = float(cfg.get("timeout_sec", DEFAULTS["timeout_sec"]))
-    max_retries = int(cfg.get("max_retries", DEFAULTS["max_retries"]))
-    backoff_base = float(cfg.get("backoff_base", DEFAULTS["backoff_base"]))
-    backoff_cap = float(cfg.get("backoff_cap", DEFAULTS["backoff_cap"]))
-    respect_robots = bool(cfg.get("respect_robots", DEFAULTS["respect_robots"]))
-    header_overrides = cfg.get("headers", {}) or {}
-
-    log(f"[{index}/{len(RESULTS) + len(queue) + 1}] 🌐 {host} → GET {url}")
-
-    # robots posture
-    if respect_robots and not allowed_by_robots(host, path):
-        RESULTS.append({
-            "index": index, "url": url, "ok": False, "skipped": True,
-            "reason": "robots_disallow", "host": host,
-        })
-        log(f"   🚫 skipped by robots.txt")
-        continue
-
-    # Per-host pacing
-    now_ts = time.time()
-    if host in last_hit:
-        delta = now_ts - last_hit[host]
-        if delta < per_host_delay:
-            time.sleep(per_host_delay - delta)
-
-    rec = {
-        "index": index,
-        "url": url,
-        "ok": False,
-        "path": None,
-        "bytes": 0,
-        "content_type": None,
-        "status": None,
-        "fetched_at": None,
-        "elapsed_sec": None,
-        "error": None,
-        "host": host,
-        "final_url": None,
-        "sha256": None,
-        "headers": None,          # response headers
-        "request_headers": None,  # request headers actually sent
-    }
+        if interrupted:
+            summary["interrupted"] = True
+        if self.resume:
+            summary["resumed"] = True
+
+        out = self.out_dir / "l1_summary.json"
+        tmp = out.with_suffix(".json.tmp")
+        with open(self.journal_path, "rb") as jf, open(tmp, "w", encoding="utf-8") as f:
+            f.write('{\n  "summary": ' + _json_block(summary, 2) + ',\n  "fetched": ')
+            if not latest:
+                f.write("[]")
+            else:
+                f.write("[\n")
+                for i, index in enumerate(sorted(latest)):
+                    jf.seek(latest[index][0])
+                    rec = json.loads(jf.readline())["rec"]
+                    f.write((",\n" if i else "") + "    " + _json_block(rec, 4))
+                f.write("\n  ]")
+            f.write("\n}")
+        tmp.replace(out)
+        if not interrupted:
+            # only a finished run becomes LATEST: a run in progress, crashed or interrupted never does
+            retention.mark_latest(self.config.out_root, self.out_dir)
+        return summary
+
+    # =========================
+    # Single URL fetch (runs on a worker thread; one per host at a time)
+    # =========================
+    def fetch_one(self, index: int, url: str, first_attempt: int = 1) -> tuple[dict, "LinkCollector | None"]:
+        """
+        Fetch one URL with per-host retries/backoff. Returns (result record, expansion link collector).
+        A retryable Retry-After returns early with rec["requeue_attempt"] set: the scheduler requeues
+        the URL behind the host's hold instead of this worker sleeping through it.
+        """
+        parsed = urlparse(url)
+        host = parsed.netloc
+        path = parsed.path or "/"
+
+        cfg = self.config.domain(host)
+        timeout_sec = float(cfg.get("timeout_sec", DEFAULTS["timeout_sec"]))
+        max_retries = int(cfg.get("max_retries", DEFAULTS["max_retries"]))
+        backoff_base = float(cfg.get("backoff_base", DEFAULTS["backoff_base"]))
+        backoff_cap = float(cfg.get("backoff_cap", DEFAULTS["backoff_cap"]))
+        respect_robots = bool(cfg.get("respect_robots", DEFAULTS["respect_robots"]))
+        keep_alive = bool(cfg.get("keep_alive", DEFAULTS["keep_alive"]))
+        conditional_get = bool(cfg.get("conditional_get", DEFAULTS["conditional_get"]))
+        max_body_bytes = int(cfg.get("max_body_bytes", DEFAULTS["max_body_bytes"]) or 0)
+        max_retry_after = float(cfg.get("max_retry_after", DEFAULTS["max_retry_after"]))
+        header_overrides = cfg.get("headers", {}) or {}
+        use_blobs = self.config.use_blobs
+        out_dir = self.out_dir
+        rate, breaker, dns = self.rate, self.breaker, self.dns
+
+        # robots posture
+        if respect_robots and not self.robots.allowed(host, path + (f"?{parsed.query}" if parsed.query else ""), parsed.scheme or "https"):
+            log(f"[{index}] 🚫 skipped by robots.txt")
+            return {
+                "index": index, "url": url, "ok": False, "skipped": True,
+                "reason": "robots_disallow", "host": host,
+            }, None
+
+        rec = {
+            "index": index,
+            "url": url,
+            "ok": False,
+            "path": None,
+            "bytes": 0,
+            "content_type": None,
+            "status": None,
+            "fetched_at": None,
+            "elapsed_sec": None,
+            "error": None,
+            "host": host,
+            "final_url": None,
+            "sha256": None,
+            "headers": None,          # response headers
+            "request_headers": None,  # request headers actually sent
+        }
+        links = None
+
+        last_err = None
+        start_clock = time.time()
+
+        for attempt in range(first_attempt, max_retries + 1):
+            ua = random.choice(UAS)
+            log(f"[{index}]   ↳ attempt {attempt}/{max_retries} …")
+            try:
+                req, req_headers = make_request(url, ua, header_overrides, keep_alive)
+                prev = self.validators.validators(url) if conditional_get else None
+                for hk, hv in conditional_headers(prev).items():
+                    req.add_header(hk, hv)
+                    req_headers[hk] = hv
+                start = time.time()
+                dns.reset_spent()
+                try:
+                    opened = self.open_url(req, req_headers, timeout_sec, keep_alive, max_body_bytes)
+                except urllib.error.HTTPError as e:
+                    if e.code != 304:
+                        raise
+                    opened = e  # urlopen surfaces 304 as HTTPError; it still behaves like a response
+                with opened as resp:
+                    ttfb = time.time() - start  # response headers in hand: the host's latency, before body I/O
+                    status = resp.getcode() or 200
+                    hdrs = {k.lower(): v for k, v in resp.headers.items()}
+                    not_modified = status == 304 and prev is not None
+
+                    undecoded = None
+                    rule = self.config.expand_rule(host)
+                    collector = None
+                    if rule and rule["max_new"] > 0:
+                        ct_now = prev.get("content_type") if not_modified else resp.info().get_content_type()
+                        if ct_now == "text/html":
+                            base_url = (prev.get("final_url") if not_modified else None) or resp.geturl()
+                            collector = LinkCollector(base_url, host, rule, self.frontier.is_new)
+                    if not_modified:
+                        # Unchanged since last run: reuse the previous body, no download
+                        fname, path_fp, digest, size = self.reuse_body(index, prev)
+                        if collector is not None:
+                            with at_rest.open_read(path_fp) as f:
+                                while not collector.done:
+                                    chunk = f.read(CHUNK_SIZE)
+                                    if not chunk:
+                                        break
+                                    collector.feed(chunk)
+                        ct = prev.get("content_type")
+                        final_url = prev.get("final_url") or resp.geturl()
+                    else:
+                        ct = resp.info().get_content_type()
+                        part_dir = self.config.blobs_dir if use_blobs else out_dir
+                        part = part_dir / f".source_{index:03d}.{threading.get_ident()}.part"
+                        digest, size, head, undecoded, codec = stream_body(
+                            resp, part, max_body_bytes, collector.feed if collector is not None else None,
+                            None if ct.startswith("image/") else self.config.codec,
+                        )
+                        # still-encoded bytes are not HTML/JSON, whatever Content-Type says
+                        fname = f"source_{index:03d}{'.bin' if undecoded else sniff_ext(ct, head)}"
+                        if use_blobs:
+                            path_fp = commit_blob(self.config.blobs_dir, part, digest, codec)
+                        else:
+                            path_fp = at_rest.stored_path(out_dir / fname, codec)
+                            part.replace(path_fp)
+                        final_url = resp.geturl()
+                    dur = time.time() - start
+                    rate.observe(host, cfg, status, ttfb)  # body size / disk speed are not a slow-down signal
+                    breaker.record(host, cfg, False)
+
+                    meta = {
+                        "url": url,
+                        "final_url": final_url,
+                        "status": status,
+                        "content_type": ct,
+                        "bytes": size,
+                        "elapsed_sec": round(dur, 3),
+                        "ttfb_sec": round(ttfb, 3),
+                        "fetched_at": datetime.datetime.utcnow().isoformat() + "Z",
+                        "sha256": digest,
+                        "headers": hdrs,
+                        "user_agent": ua,
+                        "request_headers": req_headers,
+                        "body_file": fname,
+                        "dns_sec": dns.spent(),                # this attempt (0 = cache hit / reused connection)
+                        "dns_lookup_sec": dns.lookup_sec(host),  # host's last real lookup (often the pre-resolve)
+                    }
+                    if use_blobs:
+                        meta["blob"] = digest  # body lives at layer1/blobs/<sha256>
+                    if undecoded:
+                        meta["content_encoding_undecoded"] = undecoded
+                    if at_rest.codec_of(path_fp.name):
+                        meta["compression"] = at_rest.codec_of(path_fp.name)  # body_file names the content; add the suffix
+                    if not_modified:
+                        meta["not_modified"] = True
+                        meta["reused_from"] = prev["path"]
+                    (out_dir / f"source_{index:03d}.meta.json").write_text(
+                        json.dumps(meta, indent=2), encoding="utf-8"
+                    )
+                    self.validators.remember(url, meta, path_fp, prev if not_modified else None)
+
+                    rec.update({
+                        "ok": True,
+                        "path": str(path_fp),
+                        "bytes": size,
+                        "content_type": ct,
+                        "status": status,
+                        "fetched_at": meta["fetched_at"],
+                        "elapsed_sec": round(time.time() - start_clock, 3),
+                        "final_url": meta["final_url"],
+                        "sha256": meta["sha256"],
+                        "headers": meta["headers"],
+                        "request_headers": req_headers,
+                        "not_modified": not_modified,
+                    })
+
+                    note = " (not modified; reused previous body)" if not_modified else ""
+                    log(f"[{index}]   ✅ {status} {ct or 'unknown/ct'} {size} bytes in {dur:.2f}s → {fname}{note}")
+
+                    # ---- Optional depth-1 EXPANSION candidates (HTML only; collected while streaming) ----
+                    if collector is not None:
+                        links = collector
 
-    last_err = None
-    start_clock = time.time()
+                    break  # success -> exit retry loop
 
-    for attempt in range(1, max_retries + 1):
-        ua = random.choice(UAS)
-        log(f"   ↳ attempt {attempt}/{max_retries} …")
+            except BodyTooLarge as e:
+                last_err = f"BodyTooLarge: {e}"
+                log(f"[{index}]   ❌ {last_err}")
+                rec["error"] = last_err
+                break
+
+            except urllib.error.HTTPError as e:
+                last_err = f"HTTPError {e.code}"
+                retry_after = parse_retry_after(e.headers.get("Retry-After")) if e.code in THROTTLE_CODES and e.headers else None
+                rate.observe(host, cfg, e.code, time.time() - start, retry_after)
+                if e.code >= 500 and breaker.record(host, cfg, True):  # 4xx: the host is up; not counted either way
+                    log(f"[{index}]   🔌 circuit opened for {host}")
+                if breaker.is_open(host):
+                    log(f"[{index}]   ❌ {last_err}; circuit open, not retrying")
+                    rec["error"] = last_err
+                    break
+                if retry_after is not None and retry_after > max_retry_after:
+                    last_err += f" (Retry-After {retry_after:.0f}s)"
+                    log(f"[{index}]   ❌ {last_err}; host held, not retrying this run")
+                    rec["error"] = last_err
+                    break
+                if e.code in (429, 500, 502, 503, 504, 403) and attempt < max_retries:
+                    if retry_after:
+                        log(f"[{index}]   ⏳ {last_err} (Retry-After {retry_after:.0f}s); requeued behind the host's hold …")
+                        rec.update({"error": last_err, "requeue_attempt": attempt + 1})
+                        break
+                    log(f"[{index}]   ⚠️  {last_err}; backing off and retrying …")
+                    backoff_sleep(attempt, backoff_base, backoff_cap)
+                    continue
+                log(f"[{index}]   ❌ {last_err}")
+                rec["error"] = last_err
+                break
+
+            except urllib.error.URLError as e:
+                reason = getattr(e, "reason", "")
+                last_err = f"URLError {reason}"
+                rate.observe(host, cfg, None, None)
+                if breaker.record(host, cfg, True):
+                    log(f"[{index}]   🔌 circuit opened for {host}")
+                if attempt < max_retries and not breaker.is_open(host):
+                    log(f"[{index}]   ⚠️  {last_err}; backing off and retrying …")
+                    backoff_sleep(attempt, backoff_base, backoff_cap)
+                    continue
+                log(f"[{index}]   ❌ {last_err}")
+                rec["error"] = last_err
+                break
+
+            except Exception as e:
+                last_err = f"{type(e).__name__}: {e}"
+                if isinstance(e, (OSError, http.client.HTTPException)):
+                    rate.observe(host, cfg, None, None)  # timeouts / resets count as congestion
+                    if breaker.record(host, cfg, True):
+                        log(f"[{index}]   🔌 circuit opened for {host}")
+                if attempt < max_retries and not breaker.is_open(host):
+                    log(f"[{index}]   ⚠️  {last_err}; backing off and retrying …")
+                    backoff_sleep(attempt, backoff_base, backoff_cap)
+                    continue
+                log(f"[{index}]   ❌ {last_err}")
+                rec["error"] = last_err
+                break
+
+        if not rec["ok"] and not rec["error"]:
+            rec["error"] = last_err or "fetch failed"
+
+        return rec, links
+
+    def carry_forward(self, index: int, url: str, prev: dict, reason: str) -> dict:
+        """No request: this run's source_NNN reuses the last good body (sidecar marks it carried_forward)."""
+        fname, path_fp, digest, size = self.reuse_body(index, prev)
+        meta = {
+            "url": url,
+            "final_url": prev.get("final_url") or url,
+            "status": None,
+            "content_type": prev.get("content_type"),
+            "bytes": size,
+            "elapsed_sec": 0.0,
+            "fetched_at": prev.get("fetched_at"),  # when this body was actually downloaded / revalidated
+            "sha256": digest,
+            "headers": {},
+            "user_agent": None,
+            "request_headers": {},
+            "body_file": fname,
+            "carried_forward": reason,
+            "reused_from": prev["path"],
+        }
+        if self.config.use_blobs:
+            meta["blob"] = digest
+        if at_rest.codec_of(path_fp.name):
+            meta["compression"] = at_rest.codec_of(path_fp.name)
+        (self.out_dir / f"source_{index:03d}.meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        return {
+            "index": index, "url": url, "ok": False, "skipped": True, "carried_forward": True, "reason": "no_new_draw",
+            "host": urlparse(url).netloc, "path": str(path_fp), "bytes": size,
+            "content_type": meta["content_type"], "final_url": meta["final_url"],
+            "sha256": digest, "fetched_at": meta["fetched_at"],
+        }
+
+    # =========================
+    # Main loop (scheduler: different hosts in parallel, per-host pacing preserved)
+    # =========================
+    def pacing_hold(self, host: str) -> float:
+        """Retry-After hold worth waiting for (<= max_retry_after from now); longer holds skip the host's URLs."""
+        hold = self.rate.hold_until(host)
+        limit = float(self.config.domain(host).get("max_retry_after", DEFAULTS["max_retry_after"]))
+        return hold if hold - time.time() <= limit else 0.0
+
+    def held_too_long(self, host: str) -> bool:
+        return self.rate.hold_until(host) > time.time() and not self.pacing_hold(host)
+
+    def queue_links(self, host: str, rec: dict, collector: LinkCollector) -> int:
+        """Queue up to max_new of a page's expansion links that are new to the frontier; returns how many."""
+        max_new = self.config.expand_rule(host)["max_new"]
+        added = 0
+        for link in collector.links:
+            if added >= max_new:
+                break
+            if self.frontier.add(link):
+                added += 1
+        if added < max_new and collector.truncated and rec.get("path"):
+            # Streaming stopped at max_new links that were new back then; some have been queued since
+            # (by lower-index pages), so finish from the stored body against the frontier as it is now
+            again = collector.restart(self.frontier.is_new)
+            with at_rest.open_read(pathlib.Path(rec["path"])) as f:
+                while not again.done:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    again.feed(chunk)
+            for link in again.links:
+                if added >= max_new:
+                    break
+                if self.frontier.add(link):
+                    added += 1
+        return added
+
+    def release_held(self, held: dict, in_flight: dict):
+        """
+        Expansion in parent-index order: a finished page's links are queued (then its result journaled)
+        only once every lower index has finished, so source_NNN numbering and dedup winners match a
+        sequential run whatever the completion order. A crash in between re-fetches the held pages.
+        """
+        while held:
+            index = min(held)
+            open_indices = [i for i, _, _ in in_flight.values()]
+            low = self.frontier.lowest_index()
+            if low is not None:
+                open_indices.append(low)
+            if open_indices and min(open_indices) < index:
+                return
+            host, rec, collector = held.pop(index)
+            added = self.queue_links(host, rec, collector)
+            if added:
+                log(f"[{index}]   ➕ queued {added} same-site links (expand.yaml)")
+            self.journal.result(rec)
+
+    def run(self) -> dict:
+        """Seed (or restore) the frontier, fetch until it is empty, write l1_summary.json; returns the summary."""
+        config, frontier, journal = self.config, self.frontier, self.journal
+        seed_urls = self._seed()
+        log(f"🔎 Fetch plan: {len(frontier)} URLs (FAST={'on' if config.fast else 'off'}; LIMIT={config.limit or 'none'})")
+        log(f"   • targets file: {config.targets_file}")
+
+        max_concurrency = config.max_concurrency
+        log(f"   • concurrency: {max_concurrency} (one in-flight request per host)")
+
+        next_ok = {h: self.pacing_hold(h) for h in frontier.hosts()}  # host -> earliest timestamp the next request may start
+        busy_hosts = set() # hosts with a request in flight
+        in_flight = {}     # future -> (index, url, host)
+        attempts = {}      # index -> attempt to resume at (URLs requeued behind a Retry-After hold)
+        held = {}          # index -> (host, rec, LinkCollector): finished pages waiting to expand in index order
+
+        pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="l1-fetch")
+        robots_pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="l1-robots")
+        dns_pool = ThreadPoolExecutor(max_workers=max(max_concurrency, 8), thread_name_prefix="l1-dns")
+        self.dns.prefetch(seed_urls, dns_pool)
+        self.robots.prefetch(seed_urls, robots_pool)
         try:
-            req, req_headers = make_request(url, ua, header_overrides)
-            start = time.time()
-            with urllib.request.urlopen(req, timeout=timeout_sec) as resp:
-                status = resp.getcode() or 200
-                raw = resp.read()
-                body = decode_body(resp, raw)
-                ct = resp.info().get_content_type()
-                dur = time.time() - start
-
-                ext = sniff_ext(ct, body)
-                fname = f"source_{index:03d}{ext}"
-                path_fp = OUT_DIR / fname
-                with open(path_fp, "wb") as w:
-                    w.write(body)
-
-                hdrs = {k.lower(): v for k, v in resp.headers.items()}
-                meta = {
-                    "url": url,
-                    "final_url": resp.geturl(),
-                    "status": status,
-                    "content_type": ct,
-                    "bytes": len(body),
-                    "elapsed_sec": round(dur, 3),
-                    "fetched_at": datetime.datetime.utcnow().isoformat() + "Z",
-                    "sha256": sha256_bytes(body),
-                    "headers": hdrs,
-                    "user_agent": ua,
-                    "request_headers": req_headers,
-                }
-                (OUT_DIR / f"source_{index:03d}.meta.json").write_text(
-                    json.dumps(meta, indent=2), encoding="utf-8"
-                )
-
-                rec.update({
-                    "ok": True,
-                    "path": str(path_fp),
-                    "bytes": len(body),
-                    "content_type": ct,
-                    "status": status,
-                    "fetched_at": meta["fetched_at"],
-                    "elapsed_sec": round(time.time() - start_clock, 3),
-                    "final_url": meta["final_url"],
-                    "sha256": meta["sha256"],
-                    "headers": meta["headers"],
-                    "request_headers": req_headers,
-                })
-
-                log(f"   ✅ {status} {ct or 'unknown/ct'} {len(body)} bytes in {dur:.2f}s → {fname}")
-
-                # ---- Optional depth-1 EXPANSION (HTML only) ----
-                rules = EXPAND.get(host)
-                if rules and ct == "text/html":
-                    max_new = int(rules.get("max_new", 0) or 0)
-                    if max_new > 0:
-                        added = 0
-                        for link in extract_links(meta["final_url"], body):
-                            # same-site only
-                            if urlparse(link).netloc != host:
-                                continue
-                            if link in seen_urls:
-                                continue
-                            if not allow_expand(host, link):
-                                continue
-                            seen_urls.add(link)
-                            queue.append(link)
-                            added += 1
-                            if added >= max_new:
-                                break
-                        if added:
-                            log(f"   ➕ queued {added} same-site links (expand.yaml)")
-
-                break  # success -> exit retry loop
+            while len(frontier) or in_flight or held:
+                # Dispatch: round-robin over idle hosts whose pacing window has opened
+                now_ts = time.time()
+                ready = lambda h: h not in busy_hosts and next_ok.get(h, 0.0) <= now_ts
+                while len(in_flight) < max_concurrency:
+                    item = frontier.pop_ready(ready)
+                    if item is None:
+                        break
+                    index, url, host = item
+                    reason = self.not_due.get(canonical_url(url))
+                    prev = self.validators.previous_body(url) if reason else None
+                    if prev is not None:
+                        log(f"[{index}] 📅 {reason} — reusing previous body for {url}")
+                        journal.result(self.carry_forward(index, url, prev, reason))
+                        continue
+                    if self.breaker.is_open(host) or self.held_too_long(host):
+                        reason = "circuit_open" if self.breaker.is_open(host) else "retry_after_hold"
+                        log(f"[{index}] ⏸  {host}: {reason} — skipping {url}")
+                        journal.result({
+                            "index": index, "url": url, "ok": False, "skipped": True,
+                            "reason": reason, "host": host,
+                        })
+                        self.host_stats.setdefault(host, {}).update(self.breaker.host_stats(host))
+                        continue
+                    log(f"[{index}/{self.already_done + journal.done + len(in_flight) + len(frontier) + 1}] 🌐 {host} → GET {url}")
+                    busy_hosts.add(host)
+                    in_flight[pool.submit(self.fetch_one, index, url, attempts.pop(index, 1))] = (index, url, host)
+                self.release_held(held, in_flight)  # dispatch-time skips may have been all a held page waited on
+                if not len(frontier) and not in_flight:
+                    continue
 
-        except urllib.error.HTTPError as e:
-            last_err = f"HTTPError {e.code}"
-            if e.code in (429, 500, 502, 503, 504, 403) and attempt < max_retries:
-                log(f"   ⚠️  {last_err}; backing off and retrying …")
-                backoff_sleep(attempt, float(PACING["defaults"]["backoff_base"]), float(PACING["defaults"]["backoff_cap"]))
-                continue
-            log(f"   ❌ {last_err}")
-            rec["error"] = last_err
-            break
-
-        except urllib.error.URLError as e:
-            reason = getattr(e, "reason", "")
-            last_err = f"URLError {reason}"
-            if attempt < max_retries:
-                log(f"   ⚠️  {last_err}; backing off and retrying …")
-                backoff_sleep(attempt, float(PACING["defaults"]["backoff_base"]), float(PACING["defaults"]["backoff_cap"]))
-                continue
-            log(f"   ❌ {last_err}")
-            rec["error"] = last_err
-            break
-
-        except Exception as e:
-            last_err = f"{type(e).__name__}: {e}"
-            if attempt < max_retries:
-                log(f"   ⚠️  {last_err}; backing off and retrying …")
-                backoff_sleep(attempt, float(PACING["defaults"]["backoff_base"]), float(PACING["defaults"]["backoff_cap"]))
-                continue
-            log(f"   ❌ {last_err}")
-            rec["error"] = last_err
-            break
+                # Sleep until a request completes or the next idle host's pacing window opens
+                # (with every slot busy a pacing window can't dispatch anything: wait for a completion only)
+                waiting = [next_ok.get(h, 0.0) for h in frontier.hosts() if h not in busy_hosts]
+                if waiting and len(in_flight) < max_concurrency:
+                    timeout = max(0.0, min(waiting) - time.time())
+                else:
+                    timeout = None
+                if not in_flight:
+                    time.sleep(timeout or 0.0)
+                    continue
+                done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
 
-    if not rec["ok"] and not rec["error"]:
-        rec["error"] = last_err or "fetch failed"
+                for fut in done:
+                    index_done, url, host = in_flight.pop(fut)
+                    busy_hosts.discard(host)
+                    try:
+                        rec, links = fut.result()
+                    except Exception as e:
+                        rec, links = {
+                            "index": index_done, "url": url, "ok": False, "host": host,
+                            "error": f"{type(e).__name__}: {e}",
+                        }, None
 
-    RESULTS.append(rec)
+                    if rec.get("skipped"):
+                        journal.result(rec)
+                        continue
 
-    hs = HOST_STATS.setdefault(host, {"ok": 0, "fail": 0, "bytes": 0})
-    if rec["ok"]:
-        hs["ok"] += 1
-        hs["bytes"] += rec.get("bytes", 0)
-        log(f"[{index}] ✔ done ({rec['elapsed_sec']}s total)")
-    else:
-        hs["fail"] += 1
-        log(f"[{index}] ✖ failed: {rec.get('error', 'unknown error')}")
-
-    last_hit[host] = time.time()
-    jitter_sleep(jmin, jmax)
-
-# =========================
-# Summary
-# =========================
-summary = {
-    "run_id": RUN_ID,
-    "count": len(RESULTS),
-    "ok": sum(1 for r in RESULTS if r.get("ok")),
-    "skipped": sum(1 for r in RESULTS if r.get("skipped")),
-    "ts": datetime.datetime.utcnow().isoformat() + "Z",
-    "out_dir": str(OUT_DIR),
-    "hosts": HOST_STATS,
-    "defaults": PACING.get("defaults", DEFAULTS),
-    "targets_file": TARGETS_FILE,
-    "expand_rules": list(EXPAND.keys()),
-}
+                    if rec.get("requeue_attempt"):
+                        # Retry-After: back to the front of its host queue; the hold (RateController) gates it
+                        frontier.requeue(index_done, url)
+                        attempts[index_done] = rec["requeue_attempt"]
+                        next_ok[host] = max(next_ok.get(host, 0.0), self.pacing_hold(host))
+                        continue
+
+                    # Depth-1 expansion bookkeeping stays on the scheduler thread (release_held: parent-index
+                    # order, links queued before the result is journaled)
+                    if config.expand_rule(host) and links is not None and links.links:
+                        held[index_done] = (host, rec, links)
+                    else:
+                        journal.result(rec)
+                    hs = self.host_stats.setdefault(host, {})
+                    hs.update(self.pool.host_stats(host))
+                    hs.update(self.rate.host_stats(host))
+                    hs.update(self.breaker.host_stats(host))
+                    if rec["ok"]:
+                        log(f"[{index_done}] ✔ done ({rec['elapsed_sec']}s total)")
+                    else:
+                        log(f"[{index_done}] ✖ failed: {rec.get('error', 'unknown error')}")
+
+                    # Per-host pacing: jitter + (learned or fixed) delay gate the next request to this host only
+                    cfg = config.domain(host)
+                    if cfg.get("adaptive_pacing", DEFAULTS["adaptive_pacing"]):
+                        per_host_delay = self.rate.delay(host, cfg)
+                    else:
+                        per_host_delay = float(cfg.get("per_host_delay", DEFAULTS["per_host_delay"]))
+                    jmin = float(cfg.get("jitter_min", DEFAULTS["jitter_min"]))
+                    jmax = float(cfg.get("jitter_max", DEFAULTS["jitter_max"]))
+                    next_ok[host] = max(time.time() + max(per_host_delay, jitter_delay(jmin, jmax)), self.pacing_hold(host))
+                self.release_held(held, in_flight)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            robots_pool.shutdown(wait=False, cancel_futures=True)
+            dns_pool.shutdown(wait=False, cancel_futures=True)
+            self.pool.close_all()
+
+        journal.close()
+        return self.write_summary()
+
+def run(config: FetchConfig | None = None, run_id: str | None = None, resume: bool = False,
+        urls: list[str] | None = None) -> dict:
+    """Library entry point: one Layer 1 run (config defaults to FetchConfig.from_env()); returns the summary."""
+    return Fetcher(config or FetchConfig.from_env(), run_id=run_id, resume=resume, urls=urls).run()
+
+# =========================
+# CLI (graceful Ctrl+C: partial summary still written)
+# =========================
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Layer 1 fetch (pacing via layer1/pacing.yaml; env: FAST, LIMIT, TARGETS_FILE, CONCURRENCY, SCHEDULE)")
+    ap.add_argument("--resume", metavar="RUN_ID",
+                    help="continue layer1/out/RUN_ID from its journal: completed URLs are skipped, the frontier is restored")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        fetcher = Fetcher(FetchConfig.from_env(), run_id=args.resume, resume=bool(args.resume))
+    except FileNotFoundError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    def _sigint_handler(signum, frame):
+        log("⏹  Received Ctrl+C — writing partial summary and exiting…")
+        try:
+            fetcher.write_summary(interrupted=True)
+        finally:
+            sys.exit(130)
+
+    signal.signal(signal.SIGINT, _sigint_handler)
+    summary = fetcher.run()
+    print(json.dumps(summary, indent=2))
 
-(OUT_DIR / "l1_summary.json").write_text(
-    json.dumps({"summary": summary, "fetched": RESULTS}, indent=2),
-    encoding="utf-8",
-)
-print(json.dumps(summary, indent=2))
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
-import os, json, time, urllib.request, urllib.error
+import os, sys, json, time, urllib.request, urllib.error
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import at_rest  # COMPRESS=gz|zst stores the text artifacts compressed (layer1/at_rest.py)
 
 OUTDIR = "layer1/snaps"
 os.makedirs(OUTDIR, exist_ok=True)
+CODEC = at_rest.codec_for(os.getenv("COMPRESS"))
 
 MEGA = "https://www.megamillions.com/cmspages/utilservice.asmx/GetLatestDrawData"
 PB   = "https://www.powerball.com/api/v1/numbers/powerball/recent?_format=json"
@@ -12,14 +16,12 @@ def save(url, body, ext="json"):
     slug = url.replace("/", "_").replace(":", "_").replace("?", "_").replace("&", "_")
     base = os.path.join(OUTDIR, slug)[:200]
     # clean body file (what the extractor will read first)
-    with open(base + ".body.json", "w", encoding="utf-8") as f:
-        f.write(body)
+    at_rest.write_text(base + ".body.json", body, CODEC)
     # minimal artifacts so the rest of the pipeline still works
-    with open(base + ".network.json", "w", encoding="utf-8") as f:
-        json.dump([{"url": url, "status": 200, "contentType": "application/json"}], f)
+    at_rest.write_text(base + ".network.json", json.dumps([{"url": url, "status": 200, "contentType": "application/json"}]), CODEC)
     with open(base + ".meta.json", "w", encoding="utf-8") as f:
         json.dump({"url": url, "final_url": url, "status": 200, "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ")}, f)
-    open(base + ".html", "w", encoding="utf-8").write("<html><body>synthetic</body></html>")
+    at_rest.write_text(base + ".html", "<html><body>synthetic</body></html>", CODEC)
     print("FETCH OK", url)
 
 def get(url, method="GET", data=None, headers=None):
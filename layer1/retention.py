@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Run-directory retention for layer1/out and layer2/out (policy: layer1/retention.yaml)
+- <layer>/out/LATEST names the newest finished run: latest_run() reads it instead of listing every
+  run dir, and falls back to the scan when the pointer is missing or stale (fetch.py / parse_and_classify.py
+  move it forward once a run's summary / output is written)
+- Per layer: keep the last N runs, plus the newest run of each UTC day for M days; older runs are
+  compacted into <layer>/archive/<run>.tar.gz (or deleted with archive: false)
+- Size caps: max_mb bounds the kept run dirs (daily keeps go oldest first), archive_max_mb the
+  archives (oldest deleted first)
+- Never pruned: the LATEST run and anything newer, dirs not named YYYYMMDD-HHMMSS, and layer1
+  runs whose bodies layer1/cache/validators.json still points at (conditional GET / carry-forward)
+- Layer 1 archives are self-contained (blob-store bodies are packed next to their sidecars);
+  afterwards blobs no remaining run or validator references are removed (blob_gc)
+- CLI: python3 layer1/retention.py [--layer layer1|layer2] [--dry-run] [--json]
+"""
+
+import os, re, json, pathlib, datetime, argparse, shutil, tarfile
+
+import at_rest  # layer1/at_rest.py: bodies may be stored as .gz / .zst
+
+POLICY_PATH = pathlib.Path("layer1/retention.yaml")
+LATEST = "LATEST"
+LAYERS = ("layer1", "layer2")
+RUN_NAME = re.compile(r"^\d{8}-\d{6}$")
+BLOB_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+DEFAULTS = {
+    "layer1": {"keep_last": 5, "keep_daily_days": 14, "max_mb": 200, "archive": True, "archive_max_mb": 100, "blob_gc": True},
+    "layer2": {"keep_last": 10, "keep_daily_days": 30, "max_mb": 50, "archive": True, "archive_max_mb": 20},
+}
+
+def log(msg: str):
+    print(msg, flush=True)
+
+# =========================
+# LATEST pointer
+# =========================
+def run_dirs(out_root: pathlib.Path) -> list[pathlib.Path]:
+    return sorted(p for p in out_root.iterdir() if p.is_dir())
+
+def read_latest(out_root: pathlib.Path) -> pathlib.Path | None:
+    """The run LATEST names, if it is still there."""
+    try:
+        name = (out_root / LATEST).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    if not name or name in (".", "..") or "/" in name or "\\" in name:
+        return None
+    run = out_root / name
+    return run if run.is_dir() else None
+
+def latest_run(out_root: pathlib.Path, require: str | None = None) -> pathlib.Path | None:
+    """
+    Newest run dir (optionally: the newest holding the file `require`). O(1) through LATEST;
+    scans and sorts the run dirs only when the pointer is missing, stale or lacks `require`.
+    """
+    run = read_latest(out_root)
+    if run is not None and (require is None or (run / require).is_file()):
+        return run
+    if not out_root.is_dir():
+        return None
+    runs = [p for p in run_dirs(out_root) if require is None or (p / require).is_file()]
+    return runs[-1] if runs else None
+
+def mark_latest(out_root: pathlib.Path, run_dir: pathlib.Path):
+    """Point LATEST at run_dir unless it already names a newer run (a resumed older run keeps it)."""
+    current = read_latest(out_root)
+    if current is not None and current.name > run_dir.name:
+        return
+    tmp = out_root / f"{LATEST}.tmp"
+    tmp.write_text(run_dir.name + "\n", encoding="utf-8")
+    os.replace(tmp, out_root / LATEST)
+
+# =========================
+# Policy
+# =========================
+def load_policy(path: pathlib.Path = POLICY_PATH) -> dict:
+    """{layer: {keep_last, keep_daily_days, max_mb, archive, archive_max_mb[, blob_gc]}}; unknown keys ignored."""
+    policy = {layer: dict(v) for layer, v in DEFAULTS.items()}
+    try:
+        import yaml  # type: ignore
+        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except Exception:
+        data = {}
+    for layer in LAYERS:
+        if isinstance(data.get(layer), dict):
+            for k, v in data[layer].items():
+                if k in policy[layer]:
+                    policy[layer][k] = v
+    return policy
+
+def _run_day(name: str) -> datetime.date:
+    return datetime.datetime.strptime(name[:8], "%Y%m%d").date()
+
+def dir_size(path: pathlib.Path) -> int:
+    total = 0
+    for dirpath, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.lstat(os.path.join(dirpath, f)).st_size
+            except OSError:
+                pass
+    return total
+
+def plan(out_root: pathlib.Path, policy: dict, now: datetime.datetime | None = None,
+         protected: set | None = None) -> dict:
+    """{"keep": {name: reason}, "prune": [names, oldest first]} for the YYYYMMDD-HHMMSS runs under out_root."""
+    runs = [p.name for p in run_dirs(out_root) if RUN_NAME.match(p.name)]
+    keep = {}
+    keep_last = int(policy.get("keep_last") or 0)
+    for name in runs[-keep_last:] if keep_last > 0 else []:
+        keep[name] = "last"
+    latest = latest_run(out_root)
+    for name in runs:
+        if latest is not None and name >= latest.name:
+            keep.setdefault(name, "latest")
+        if name in (protected or ()):
+            keep.setdefault(name, "referenced")
+
+    today = (now or datetime.datetime.utcnow()).date()
+    days = int(policy.get("keep_daily_days") or 0)
+    seen = set()
+    for name in reversed(runs):
+        day = _run_day(name)
+        if day not in seen and (today - day).days < days:
+            seen.add(day)
+            keep.setdefault(name, "daily")
+
+    # size cap: only daily keeps give way (oldest first); last-N / latest / referenced always stay
+    if policy.get("max_mb"):
+        cap = float(policy["max_mb"]) * 1024 * 1024
+        sizes = {name: dir_size(out_root / name) for name in keep}
+        total = sum(sizes.values())
+        for name in sorted(keep):
+            if total <= cap:
+                break
+            if keep[name] == "daily":
+                total -= sizes[name]
+                del keep[name]
+    return {"keep": keep, "prune": [name for name in runs if name not in keep]}
+
+# =========================
+# Compaction
+# =========================
+def archive_run(run_dir: pathlib.Path, archive_dir: pathlib.Path, blobs_dir: pathlib.Path | None = None) -> pathlib.Path:
+    """Pack run_dir into archive_dir/<run>.tar.gz (with its blob-store bodies when blobs_dir is set), then remove it."""
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    dst = archive_dir / f"{run_dir.name}.tar.gz"
+    tmp = dst.with_name(dst.name + ".part")
+    with tarfile.open(tmp, "w:gz", compresslevel=6) as tar:
+        tar.add(run_dir, arcname=run_dir.name)
+        for meta_path in sorted(run_dir.glob("source_*.meta.json")) if blobs_dir is not None else []:
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            except Exception:
+                continue
+            name = meta.get("body_file")
+            if not meta.get("blob") or not name or at_rest.exists(run_dir / name):
+                continue
+            src = at_rest.resolve(blobs_dir / meta["blob"])
+            if src is not None:
+                body = at_rest.stored_path(pathlib.Path(run_dir.name) / name, at_rest.codec_of(src.name))
+                tar.add(src, arcname=body.as_posix())
+    os.replace(tmp, dst)
+    shutil.rmtree(run_dir)
+    return dst
+
+def cap_archives(archive_dir: pathlib.Path, max_mb, dry_run: bool = False) -> list[str]:
+    """Delete the oldest archives until they fit in max_mb; returns the removed names."""
+    if not max_mb or not archive_dir.is_dir():
+        return []
+    archives = sorted(archive_dir.glob("*.tar.gz"))
+    total = sum(a.stat().st_size for a in archives)
+    cap = float(max_mb) * 1024 * 1024
+    removed = []
+    for a in archives:
+        if total <= cap:
+            break
+        total -= a.stat().st_size
+        removed.append(a.name)
+        if not dry_run:
+            a.unlink()
+    return removed
+
+def _validator_paths(root: pathlib.Path) -> list[pathlib.Path]:
+    try:
+        entries = json.loads((root / "layer1" / "cache" / "validators.json").read_text(encoding="utf-8"))
+    except Exception:
+        return []
+    paths = []
+    for v in entries.values() if isinstance(entries, dict) else []:
+        if isinstance(v, dict) and v.get("path"):
+            p = pathlib.Path(v["path"])
+            paths.append(p if p.is_absolute() else root / p)
+    return paths
+
+def referenced_runs(root: pathlib.Path, out_root: pathlib.Path) -> set:
+    """Run names under out_root that validators.json entries point into."""
+    base = out_root.resolve()
+    return {p.resolve().parent.name for p in _validator_paths(root) if p.resolve().parent.parent == base}
+
+def gc_blobs(root: pathlib.Path, skip_runs: set | None = None, dry_run: bool = False) -> tuple[int, int]:
+    """Remove blobs no layer1/out sidecar (outside skip_runs) or validator references; (count, bytes)."""
+    blobs_dir = root / "layer1" / "blobs"
+    if not blobs_dir.is_dir():
+        return 0, 0
+    refs = {at_rest.logical_name(p.name) for p in _validator_paths(root)}
+    for meta_path in (root / "layer1" / "out").glob("*/source_*.meta.json"):
+        if meta_path.parent.name in (skip_runs or ()):
+            continue
+        try:
+            blob = json.loads(meta_path.read_text(encoding="utf-8")).get("blob")
+        except Exception:
+            continue
+        if blob:
+            refs.add(blob)
+    count = size = 0
+    for f in blobs_dir.iterdir():
+        name = at_rest.logical_name(f.name)
+        if not f.is_file() or not BLOB_NAME.match(name) or name in refs:
+            continue
+        count += 1
+        size += f.stat().st_size
+        if not dry_run:
+            f.unlink()
+    return count, size
+
+def enforce(root: pathlib.Path, layer: str, policy: dict, dry_run: bool = False,
+            now: datetime.datetime | None = None) -> dict:
+    """Apply one layer's policy; returns what was (or, with dry_run, would be) kept / archived / deleted."""
+    out_root = root / layer / "out"
+    archive_dir = root / layer / "archive"
+    summary = {"layer": layer, "kept": [], "archived": [], "deleted": [], "archives_dropped": [],
+               "blobs_removed": 0, "blob_bytes_removed": 0, "dry_run": dry_run}
+    if not out_root.is_dir():
+        return summary
+    protected = referenced_runs(root, out_root) if layer == "layer1" else set()
+    decision = plan(out_root, policy, now, protected)
+    summary["kept"] = sorted(decision["keep"])
+    blobs_dir = root / "layer1" / "blobs" if layer == "layer1" else None
+    for name in decision["prune"]:
+        summary["archived" if policy.get("archive") else "deleted"].append(name)
+        if dry_run:
+            continue
+        if policy.get("archive"):
+            archive_run(out_root / name, archive_dir, blobs_dir)
+        else:
+            shutil.rmtree(out_root / name)
+    if not dry_run and read_latest(out_root) is None:
+        newest = latest_run(out_root)
+        if newest is not None:
+            mark_latest(out_root, newest)
+    summary["archives_dropped"] = cap_archives(archive_dir, policy.get("archive_max_mb"), dry_run)
+    if policy.get("blob_gc"):
+        skip = set(decision["prune"]) if dry_run else set()
+        summary["blobs_removed"], summary["blob_bytes_removed"] = gc_blobs(root, skip, dry_run)
+    return summary
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Prune / compact layer1/out and layer2/out run dirs")
+    ap.add_argument("--root", default=".", help="repo root")
+    ap.add_argument("--policy", default=None, help="policy file (default: <root>/layer1/retention.yaml)")
+    ap.add_argument("--layer", action="append", choices=LAYERS, help="layer to prune (repeatable; default: both)")
+    ap.add_argument("--dry-run", action="store_true", help="report what would happen, change nothing")
+    ap.add_argument("--json", action="store_true", help="print the summaries as JSON")
+    args = ap.parse_args(argv)
+
+    root = pathlib.Path(args.root)
+    policy = load_policy(pathlib.Path(args.policy) if args.policy else root / POLICY_PATH)
+    results = []
+    for layer in args.layer or LAYERS:
+        s = enforce(root, layer, policy[layer], dry_run=args.dry_run)
+        results.append(s)
+        if not args.json:
+            verb = "would " if args.dry_run else ""
+            log(f"🧹 {layer}/out: keep {len(s['kept'])}, {verb}archive {len(s['archived'])}, "
+                f"{verb}delete {len(s['deleted'])}, {verb}drop {len(s['archives_dropped'])} old archive(s)"
+                + (f", {verb}remove {s['blobs_removed']} blob(s) ({s['blob_bytes_removed']} bytes)"
+                   if policy[layer].get("blob_gc") else ""))
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
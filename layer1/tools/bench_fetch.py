@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Layer 1 throughput benchmark (offline, against layer1/tools/standin_server.py)
+- Each scenario starts a stand-in server (own process) with its latency / encoding / error settings
+  and runs fetch.Fetcher against it in a scratch root, so layer1/cache, blobs and out are untouched
+- Pacing is zeroed (no per-host delay or jitter) so the numbers measure the engine, not politeness
+- Reports URLs/sec, decoded bytes/sec, p50/p95 per-URL latency and peak RSS of the fetching process
+- Every scenario runs in a fresh subprocess (peak RSS is per process)
+- CLI: python3 layer1/tools/bench_fetch.py [--scenario NAME ...] [--repeat 3] [--concurrency N] [--json out.json]
+"""
+
+import os, sys, json, time, pathlib, argparse, subprocess, tempfile, shutil, resource
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+LAYER1 = ROOT / "layer1"
+
+# Pacing for the stand-in: no politeness delays, short backoff, Retry-After honored briefly
+BENCH_PACING = {
+    "per_host_delay": 0.0,
+    "min_delay": 0.0,
+    "jitter_min": 0.0,
+    "jitter_max": 0.0,
+    "backoff_base": 0.05,
+    "backoff_cap": 0.2,
+    "max_retries": 3,
+    "respect_robots": False,
+    "max_retry_after": 5,
+}
+
+SCENARIOS = {
+    "baseline":   {"server": {"latency_ms": 20, "encoding": "identity"}},
+    "gzip":       {"server": {"latency_ms": 20, "encoding": "gzip"}},
+    "br":         {"server": {"latency_ms": 20, "encoding": "br"}},   # identity when brotli is missing
+    "jitter":     {"server": {"latency_ms": 20, "jitter_ms": 80, "encoding": "auto"}},
+    "throttled":  {"server": {"latency_ms": 20, "encoding": "auto", "error_rate": 0.05}},
+    "revalidate": {"server": {"latency_ms": 20, "encoding": "auto"}, "passes": 2},  # 2nd pass measured: ETag → 304
+    "sequential": {"server": {"latency_ms": 20, "encoding": "auto"}, "concurrency": 1},
+}
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(pct / 100.0 * (len(s) - 1))))]
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # bytes on macOS, KiB elsewhere
+
+def start_server(opts: dict, base_port: int, targets_out: pathlib.Path) -> subprocess.Popen:
+    cmd = [sys.executable, str(LAYER1 / "tools" / "standin_server.py"), "--root", str(ROOT),
+           "--base-port", str(base_port), "--targets-out", str(targets_out)]
+    for k, v in opts.items():
+        cmd += [f"--{k.replace('_', '-')}", str(v)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = proc.stdout.readline()
+    if not line.strip().startswith("{"):
+        proc.kill()
+        raise SystemExit(f"ERROR: stand-in server did not start: {line.strip() or 'no output'}")
+    return proc
+
+def expand_urls(urls: list[str], repeat: int) -> list[str]:
+    """repeat the corpus; copies after the first carry _r=N so the frontier doesn't dedup them."""
+    out = list(urls)
+    for i in range(1, repeat):
+        out += [u + ("&" if "?" in u else "?") + f"_r={i}" for u in urls]
+    return out
+
+# =========================
+# One scenario (runs in its own process)
+# =========================
+def run_scenario(name: str, repeat: int, concurrency: int, base_port: int) -> dict:
+    sys.path.insert(0, str(LAYER1))
+    import fetch  # layer1/fetch.py
+
+    spec = SCENARIOS[name]
+    scratch = pathlib.Path(tempfile.mkdtemp(prefix=f"l1bench-{name}-"))
+    targets = scratch / "targets.txt"
+    server = start_server(spec["server"], base_port, targets)
+    try:
+        urls = expand_urls([u for u in targets.read_text(encoding="utf-8").splitlines() if u], repeat)
+        fetch.VERBOSE = False
+        for _ in range(spec.get("passes", 1)):
+            config = fetch.FetchConfig(root=scratch, concurrency=spec.get("concurrency", concurrency), schedule=False)
+            config.defaults.update(BENCH_PACING)
+            fetcher = fetch.Fetcher(config, run_id=f"bench-{time.monotonic_ns()}", urls=urls)
+            t0 = time.perf_counter()
+            summary = fetcher.run()
+            wall = time.perf_counter() - t0
+
+        data = json.loads((fetcher.out_dir / "l1_summary.json").read_text(encoding="utf-8"))
+        recs = data["fetched"]
+        ok = [r for r in recs if r.get("ok")]
+        latencies = [r["elapsed_sec"] for r in ok if r.get("elapsed_sec") is not None]
+        total_bytes = sum(r.get("bytes", 0) or 0 for r in ok)
+        p50, p95 = percentile(latencies, 50), percentile(latencies, 95)
+        return {
+            "scenario": name,
+            "urls": len(recs),
+            "ok": len(ok),
+            "failed": len(recs) - len(ok),
+            "not_modified": summary["not_modified"],
+            "concurrency": config.max_concurrency,
+            "wall_sec": round(wall, 3),
+            "urls_per_sec": round(len(recs) / wall, 2) if wall else None,
+            "bytes": total_bytes,
+            "bytes_per_sec": round(total_bytes / wall) if wall else None,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "peak_rss_mb": peak_rss_mb(),
+            "server": spec["server"],
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+# =========================
+# Suite
+# =========================
+def print_table(results: list[dict]):
+    cols = [("scenario", 12), ("urls", 6), ("ok", 6), ("urls_per_sec", 12), ("bytes_per_sec", 14),
+            ("p50_ms", 8), ("p95_ms", 8), ("peak_rss_mb", 11)]
+    print("  ".join(f"{c:>{w}}" for c, w in cols))
+    for r in results:
+        print("  ".join(f"{str(r.get(c) if r.get(c) is not None else '-'):>{w}}" for c, w in cols))
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Layer 1 fetch throughput against the local stand-in server")
+    ap.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                    help="scenario to run (repeatable; default: all)")
+    ap.add_argument("--repeat", type=int, default=3, help="fetch the recorded corpus this many times per scenario")
+    ap.add_argument("--concurrency", type=int, default=6, help="max in-flight requests (scenarios may override)")
+    ap.add_argument("--base-port", type=int, default=18700, help="stand-in server's first port")
+    ap.add_argument("--json", help="also write the results here")
+    ap.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)  # run one scenario in-process
+    args = ap.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_scenario(args.scenario[0], args.repeat, args.concurrency, args.base_port)))
+        return
+
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        print(f"⏱  {name} …", file=sys.stderr, flush=True)
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", "--scenario", name,
+               "--repeat", str(args.repeat), "--concurrency", str(args.concurrency),
+               "--base-port", str(args.base_port)]
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, text=True)
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            print(f"   ✖ {name} failed (exit {proc.returncode})", file=sys.stderr)
+            continue
+        results.append(json.loads(lines[-1]))
+
+    print_table(results)
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the lottery sites (offline Layer 1 testing / benchmarks)
+- Replays recorded bodies: layer1/out/<run>/source_NNN.* (+ blob-store sidecars) and layer1/snaps/*.body.json
+  (compressed .gz / .zst copies included)
+- One listening port per recorded host, so the fetcher's per-host pacing and pooling behave as in production
+- Serves each recording at http://127.0.0.1:<port><path>?<query>; a `_r=N` query param is ignored
+  (lets benchmarks repeat the corpus without the frontier deduping it)
+- Configurable latency (+ jitter), Content-Encoding (identity / gzip / br / auto per Accept-Encoding),
+  429/503 injection with Retry-After, ETag + If-None-Match → 304
+- Writes the local target URLs (one per line, fetch.py targets format) with --targets-out
+- CLI: python3 layer1/tools/standin_server.py [--base-port 18700] [--latency-ms 20] [--encoding auto] ...
+  prints one JSON line {"ready": true, "hosts": N, "urls": N} once listening
+"""
+
+import sys, json, time, random, pathlib, argparse, gzip, hashlib, threading
+import http.server, socketserver
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+import at_rest  # layer1/at_rest.py: recorded bodies may be stored as .gz / .zst
+
+try:
+    import brotli as _brotli  # type: ignore
+except Exception:
+    try:
+        import brotlicffi as _brotli  # type: ignore
+    except Exception:
+        _brotli = None
+
+SUFFIX_CT = {
+    ".json": "application/json",
+    ".html": "text/html",
+    ".xml": "application/xml",
+    ".txt": "text/plain",
+}
+
+# =========================
+# Corpus (recorded URL -> body)
+# =========================
+def _request_target(url: str) -> str:
+    u = urlparse(url)
+    query = [(k, v) for k, v in parse_qsl(u.query, keep_blank_values=True) if k != "_r"]
+    return (u.path or "/") + (f"?{urlencode(query)}" if query else "")
+
+def _out_body(meta_path: pathlib.Path, meta: dict, root: pathlib.Path) -> pathlib.Path | None:
+    """Body file behind a source_NNN.meta.json: blob store, body_file, or the source_NNN.<ext> sibling."""
+    if meta.get("blob"):
+        p = at_rest.resolve(root / "layer1" / "blobs" / meta["blob"])
+        if p is not None:
+            return p
+    if meta.get("body_file"):
+        p = at_rest.resolve(meta_path.parent / meta["body_file"])
+        if p is not None:
+            return p
+    stem = meta_path.name[: -len(".meta.json")]
+    for p in sorted(meta_path.parent.glob(f"{stem}.*")):
+        if not p.name.endswith(".meta.json") and not p.name.endswith(".part"):
+            return p
+    return None
+
+def load_corpus(root: pathlib.Path = pathlib.Path(".")) -> dict:
+    """{url: {"path", "content_type"}}; newer runs win, undecodable (content_encoding_undecoded) bodies are skipped."""
+    corpus = {}
+    for meta_path in sorted((root / "layer1" / "out").glob("*/source_*.meta.json")):
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        if not meta.get("url") or meta.get("content_encoding_undecoded"):
+            continue
+        body = _out_body(meta_path, meta, root)
+        if body is None:
+            continue
+        ct = meta.get("content_type") or SUFFIX_CT.get(pathlib.Path(at_rest.logical_name(body.name)).suffix, "application/octet-stream")
+        corpus[meta["url"]] = {"path": body, "content_type": ct}
+    for body in sorted((root / "layer1" / "snaps").glob("*.body.json*")):
+        name = at_rest.logical_name(body.name)
+        if not name.endswith(".body.json"):
+            continue
+        meta_path = body.with_name(name[: -len(".body.json")] + ".meta.json")
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        if meta.get("url"):
+            corpus[meta["url"]] = {"path": body, "content_type": "application/json"}
+    return corpus
+
+# =========================
+# Server
+# =========================
+class StandIn:
+    """
+    Routes (port, request target) to recorded bodies. Bodies are read and encoded lazily,
+    then kept in memory, so the server's own cost stays flat across a benchmark.
+    """
+
+    def __init__(self, corpus: dict, base_port: int = 18700, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 encoding: str = "auto", error_rate: float = 0.0, retry_after: int = 1,
+                 etag: bool = True, seed: int = 1):
+        self.latency_ms, self.jitter_ms = float(latency_ms), float(jitter_ms)
+        self.encoding = encoding
+        self.error_rate, self.retry_after = float(error_rate), int(retry_after)
+        self.etag = etag
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._cache = {}    # (url, encoding) -> bytes
+        self._routes = {}   # port -> {request target: url}
+        self.ports = {}     # recorded netloc -> local port
+        self.stats = {"requests": 0, "200": 0, "304": 0, "404": 0, "injected": 0, "bytes": 0}
+        self._servers = []
+        for url in sorted(corpus):
+            u = urlparse(url)
+            port = self.ports.setdefault(u.netloc, base_port + len(self.ports))
+            self._routes.setdefault(port, {})[_request_target(url)] = url
+        self.corpus = corpus
+
+    def local_urls(self) -> list[str]:
+        """The recorded URLs rewritten onto their local ports (corpus order)."""
+        out = []
+        for url in sorted(self.corpus):
+            u = urlparse(url)
+            out.append(f"http://127.0.0.1:{self.ports[u.netloc]}{_request_target(url)}")
+        return out
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.stats[key] += n
+
+    def _body(self, url: str, enc: str) -> bytes:
+        key = (url, enc)
+        with self._lock:
+            hit = self._cache.get(key)
+        if hit is not None:
+            return hit
+        raw = at_rest.read_bytes(self.corpus[url]["path"])
+        if enc == "gzip":
+            data = gzip.compress(raw, compresslevel=6)
+        elif enc == "br":
+            data = _brotli.compress(raw)
+        else:
+            data = raw
+        with self._lock:
+            self._cache[key] = data
+        return data
+
+    def _pick_encoding(self, accept: str) -> str:
+        accepted = {t.split(";")[0].strip().lower() for t in (accept or "").split(",")}
+        if self.encoding == "identity":
+            return "identity"
+        if self.encoding in ("br", "auto") and "br" in accepted and _brotli is not None:
+            return "br"
+        if self.encoding in ("gzip", "auto") and "gzip" in accepted:
+            return "gzip"
+        return "identity"
+
+    def _inject(self) -> int | None:
+        with self._lock:
+            if self.error_rate <= 0 or self._rng.random() >= self.error_rate:
+                return None
+            return self._rng.choice((429, 503))
+
+    def _delay(self):
+        with self._lock:
+            extra = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms > 0 else 0.0
+        if self.latency_ms + extra > 0:
+            time.sleep((self.latency_ms + extra) / 1000.0)
+
+    def handler(self):
+        standin = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so the fetcher's connection pool is exercised
+
+            def _empty(self, code: int, headers: dict | None = None):
+                self.send_response(code)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                standin._count("requests")
+                standin._delay()
+                url = standin._routes.get(self.server.server_address[1], {}).get(_request_target(self.path))
+                if url is None:
+                    standin._count("404")
+                    return self._empty(404)
+                code = standin._inject()
+                if code is not None:
+                    standin._count("injected")
+                    return self._empty(code, {"Retry-After": str(standin.retry_after)})
+                entry = standin.corpus[url]
+                enc = standin._pick_encoding(self.headers.get("Accept-Encoding"))
+                body = standin._body(url, enc)
+                headers = {"Content-Type": f"{entry['content_type']}; charset=utf-8", "Vary": "Accept-Encoding"}
+                if standin.etag:
+                    tag = '"' + hashlib.sha256(standin._body(url, "identity")).hexdigest()[:16] + '"'
+                    headers["ETag"] = tag
+                    if self.headers.get("If-None-Match") == tag:
+                        standin._count("304")
+                        return self._empty(304, {"ETag": tag})
+                if enc != "identity":
+                    headers["Content-Encoding"] = enc
+                self.send_response(200)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                standin._count("200")
+                standin._count("bytes", len(body))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Bind every host's port and serve on daemon threads."""
+        handler = self.handler()
+        for port in sorted(self._routes):
+            srv = _Server(("127.0.0.1", port), handler)
+            threading.Thread(target=srv.serve_forever, daemon=True, name=f"standin-{port}").start()
+            self._servers.append(srv)
+        return self
+
+    def stop(self):
+        for srv in self._servers:
+            srv.shutdown()
+            srv.server_close()
+        self._servers = []
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+# =========================
+# CLI
+# =========================
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Replay recorded Layer 1 bodies on local ports")
+    ap.add_argument("--root", default=".", help="repo root holding layer1/out and layer1/snaps")
+    ap.add_argument("--base-port", type=int, default=18700, help="first port; one port per recorded host")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="fixed delay before every response")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform random delay (0..jitter)")
+    ap.add_argument("--encoding", choices=("identity", "gzip", "br", "auto"), default="auto",
+                    help="Content-Encoding to apply when the client accepts it (br needs the brotli module)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 429/503")
+    ap.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on injected errors")
+    ap.add_argument("--no-etag", action="store_true", help="no ETag / 304 support")
+    ap.add_argument("--seed", type=int, default=1, help="RNG seed for jitter and error injection")
+    ap.add_argument("--targets-out", help="write the local target URLs here")
+    return ap.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    corpus = load_corpus(pathlib.Path(args.root))
+    if not corpus:
+        raise SystemExit(f"ERROR: no recorded bodies under {args.root}/layer1/out or layer1/snaps")
+    standin = StandIn(
+        corpus, base_port=args.base_port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        encoding=args.encoding, error_rate=args.error_rate, retry_after=args.retry_after,
+        etag=not args.no_etag, seed=args.seed,
+    ).start()
+    if args.targets_out:
+        pathlib.Path(args.targets_out).write_text("\n".join(standin.local_urls()) + "\n", encoding="utf-8")
+    print(json.dumps({"ready": True, "hosts": len(standin.ports), "urls": len(corpus)}), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+        print(json.dumps(standin.stats), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-import os, re, json, glob, csv
+import os, sys, re, json, glob, csv
 from datetime import datetime, timezone
 from bs4 import BeautifulSoup
 from dateutil import parser as dateparser
@@ -13,6 +13,9 @@ except Exception:
     HAVE_YAML = False
     Path = None
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "layer1"))
+import at_rest  # layer1/at_rest.py: snapshot artifacts may be stored as .gz / .zst
+
 SNAP_DIR = "layer1/snaps"
 OUT_JSON = "public/datasets/latest-draws.json"
 OUT_CSV  = "public/datasets/latest-draws.csv"
@@ -427,9 +430,9 @@ def main():
 
         # Lane A0: clean body file (from fetch_nationals.py) — preferred over everything
         body_path = base + ".body.json"
-        if os.path.exists(body_path):
+        if at_rest.exists(body_path):
             try:
-                body = open(body_path, "r", encoding="utf-8", errors="ignore").read()
+                body = at_rest.read_text(body_path)
                 recs = extract_from_network_json(body, url)
                 if recs:
                     records.extend(recs)
@@ -439,9 +442,9 @@ def main():
 
         # Lane A: network JSON captured by snapshotter
         net_path = base + ".network.json"
-        if os.path.exists(net_path):
+        if at_rest.exists(net_path):
             try:
-                nets = json.load(open(net_path))
+                nets = at_rest.load_json(net_path)
                 got = False
                 for n in nets:
                     recs = extract_from_network_json(n.get("body",""), url)
@@ -455,9 +458,9 @@ def main():
 
         # Lane B: HTML
         html_path = base + ".html"
-        if os.path.exists(html_path):
+        if at_rest.exists(html_path):
             try:
-                html = open(html_path, "r", encoding="utf-8", errors="ignore").read()
+                html = at_rest.read_text(html_path)
                 recs = extract_from_html(html, url)
                 if recs:
                     records.extend(recs)
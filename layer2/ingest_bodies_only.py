@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-import os, re, json, csv, gzip, zlib
+import os, sys, re, json, csv, gzip, zlib
 from datetime import datetime, timezone
 from dateutil import parser as dateparser
 
@@ -9,6 +9,9 @@ try:
 except Exception:
     _brotli = None
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "layer1"))
+import at_rest  # layer1/at_rest.py: .body.json.gz / .zst snapshots read transparently
+
 SNAP_DIR = "layer1/snaps"
 OUT_JSON = "public/datasets/latest-draws.json"
 OUT_CSV  = "public/datasets/latest-draws.csv"
@@ -48,8 +51,8 @@ def parse_money(s):
         return None
 
 def read_text_any(path):
-    """Read bytes; try utf-8; then gzip; then brotli; then deflate."""
-    b = open(path, 'rb').read()
+    """Read bytes (at-rest compression undone first); try utf-8; then gzip; then brotli; then deflate."""
+    b = at_rest.read_bytes(path)
 
     # try plain utf-8 first
     try:
@@ -254,10 +257,11 @@ def parse_cash4life_payload(data, url):
 def main():
     records = []
 
-    for fname in sorted(os.listdir(SNAP_DIR)):
-        if not fname.endswith(".body.json"):
-            continue
-        path = os.path.join(SNAP_DIR, fname)
+    for stored in sorted(os.listdir(SNAP_DIR)):
+        fname = at_rest.logical_name(stored)
+        if not fname.endswith(".body.json") or fname != stored and os.path.exists(os.path.join(SNAP_DIR, fname)):
+            continue  # a plain copy next to a compressed one is listed once
+        path = os.path.join(SNAP_DIR, stored)
         slug = fname[:-10]
         meta = os.path.join(SNAP_DIR, slug + ".meta.json")
         url = None
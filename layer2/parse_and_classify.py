@@ -1,36 +1,59 @@
 #!/usr/bin/env python3
 """
 Layer 2 — Parse & Classify (Lottery)
-- Reads latest Layer 1 run (uses sidecars for URL + fetched_at)
+- Reads latest Layer 1 run (layer1/out/LATEST, see layer1/retention.py; uses sidecars for URL + fetched_at)
+- Resolves bodies through the Layer 1 blob store (layer1/blobs/<sha256>) when sidecars reference it
+- Reads compressed bodies (.gz / .zst, layer1/at_rest.py) transparently, in memory
 - Parses known sources into a unified schema
-- Writes latest-draws.json and latest-draws.csv
+- Parsers take a SourceDocument: decoded text, plain text and embedded/parsed JSON are computed
+  at most once per body and shared by every parser fallback
+- Parse cache (layer2/cache/parse_cache.json): records keyed by body sha256 + parser + PARSER_VERSION
+  + source URL, so unchanged bodies skip parsing (fetched_at is re-stamped); PARSE_CACHE=0 disables;
+  hit/miss counts land in latest-draws.json under "parse_cache" (beside the per-host parse_stats)
+- Cache misses are parsed on a process pool (PARSE_WORKERS=N, default: one per core once there are
+  PARALLEL_MIN_FILES of them; 1 = in-process), merged back in source order so output is unchanged
+- Writes latest-draws.json and latest-draws.csv, then points layer2/out/LATEST at the new run
+- latest-draws.json also carries source_dates (newest parsed draw date per Layer 1 target + game),
+  which layer1/draw_schedule.py uses to skip targets that cannot have a new draw yet
 
 Schema per record:
   date (YYYY-MM-DD), game, numbers [ints], jackpot_usd (int|None),
   winners (int|None), source_url, fetched_at
 """
 
-import json, csv, re, pathlib, datetime, html
+import os, sys, json, csv, re, pathlib, datetime, html, hashlib, functools, bisect
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from urllib.parse import urlparse
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "layer1"))
+import at_rest  # layer1/at_rest.py: compressed at-rest storage
+import retention  # layer1/retention.py: LATEST run pointers
+
 BASE   = pathlib.Path(".")
 L1_OUT = BASE / "layer1" / "out"
+L1_BLOBS = BASE / "layer1" / "blobs"
 L2_OUT = BASE / "layer2" / "out"
+PARSE_CACHE_PATH = BASE / "layer2" / "cache" / "parse_cache.json"
 
 # ---------- config knobs ----------
 STATE_SCAN_WINDOW = 2500     # chars before/after each game label on state pages
 HARD_SCAN_WINDOW  = 6000     # larger window for very spread-out markup (fallback)
 JSON_MAX_RECORDS  = 500      # safety cap per file for generic JSON harvesting
+PARSER_VERSION    = 1        # bump whenever a parser can produce different records for the same body
+PARSE_CACHE_TTL_DAYS = 30    # cache entries unused this long are dropped
+PARALLEL_MIN_FILES = 8       # fewer bodies to parse than this stay in-process (pool start-up costs more)
 
 # ---------- utilities ----------
 
 MONTHS = ("jan","feb","mar","apr","may","jun","jul","aug","sep","oct","nov","dec")
+ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
 
 def latest_run_dir(root: pathlib.Path) -> pathlib.Path:
-    runs = [p for p in root.iterdir() if p.is_dir()]
-    if not runs:
+    run = retention.latest_run(root)
+    if run is None:
         raise SystemExit("No layer1 runs found")
-    return sorted(runs)[-1]
+    return run
 
 def load_sidecar_meta(p: pathlib.Path) -> dict | None:
     m = p.with_suffix(".meta.json")
@@ -41,6 +64,30 @@ def load_sidecar_meta(p: pathlib.Path) -> dict | None:
             return None
     return None
 
+BODY_SUFFIXES = (".json", ".html", ".xml", ".txt", ".bin")
+
+def run_sources(run_dir: pathlib.Path) -> list[tuple[pathlib.Path, dict]]:
+    """
+    (body path, sidecar meta) for every source in a run, in source_NNN order.
+    Body files written into the run dir are used as-is (source_001.html.gz counts as
+    source_001.html); sidecars with a "blob" ref point at the content-addressed store
+    instead of a local copy.
+    """
+    found = {}
+    for src in run_dir.glob("source_*.*"):
+        name = at_rest.logical_name(src.name)
+        if pathlib.PurePath(name).suffix in BODY_SUFFIXES:
+            found[name] = (src, load_sidecar_meta(src.with_name(name)) or {})
+    for m in run_dir.glob("source_*.meta.json"):
+        try:
+            meta = json.loads(m.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        name = meta.get("body_file")
+        if meta.get("blob") and name and name not in found:
+            found[name] = (L1_BLOBS / meta["blob"], meta)
+    return [found[k] for k in sorted(found)]
+
 def to_int_list(maybe_iter):
     out = []
     for x in (maybe_iter or []):
@@ -56,9 +103,13 @@ def _coerce_int(text):
     s = re.sub(r"[^\d]", "", str(text))
     return int(s) if s.isdigit() else None
 
+_today_fallbacks = 0  # normalize_date() calls that fell back to today's date (such records aren't cached)
+
 def normalize_date(any_text: str | None) -> str:
     """Return best-effort YYYY-MM-DD from various shapes."""
+    global _today_fallbacks
     if not any_text:
+        _today_fallbacks += 1
         return datetime.date.today().isoformat()
 
     s = str(any_text)
@@ -104,67 +155,108 @@ def make_record(date, game, numbers, jackpot_usd, winners, source_url, fetched_a
         "fetched_at": fetched_at,
     }
 
+# html_to_text passes; "<" stays outside the case-insensitive group so the scans can skip ahead on it
+_HTML_SCRIPT_RE = re.compile(r"<(?i:script)[^>]*>.*?</(?i:script)>", flags=re.S)
+_HTML_STYLE_RE  = re.compile(r"<(?i:style)[^>]*>.*?</(?i:style)>", flags=re.S)
+_HTML_TAG_RE    = re.compile(r"<[^>]+>", flags=re.S)
+# a run of [ \t\f\v] is rewritten only when it is not already a lone space
+_HSPACE_RUN_RE  = re.compile(r" [ \t\f\v]+|[\t\f\v][ \t\f\v]*")
+
+def _collapse_newline_runs(t: str) -> str:
+    """Every whitespace run holding a newline → one "\n" (line split/strip instead of a \s*\n+\s* scan)."""
+    if "\n" not in t:
+        return t
+    lines = t.split("\n")
+    out = [lines[0].rstrip()]
+    for line in lines[1:-1]:
+        line = line.strip()
+        if line:
+            out.append(line)
+    out.append(lines[-1].lstrip())
+    return "\n".join(out)
+
 def html_to_text(raw_html: str) -> str:
     """Rough HTML→text: drop scripts/styles, replace tags with spaces, unescape entities, collapse whitespace."""
     if not raw_html:
         return ""
-    t = re.sub(r"(?is)<script[^>]*>.*?</script>", " ", raw_html)
-    t = re.sub(r"(?is)<style[^>]*>.*?</style>", " ", t)
+    t = _HTML_SCRIPT_RE.sub(" ", raw_html)
+    t = _HTML_STYLE_RE.sub(" ", t)
     # replace tags with spaces so numbers separated by tags still join with whitespace
-    t = re.sub(r"(?s)<[^>]+>", " ", t)
+    t = _HTML_TAG_RE.sub(" ", t)
     t = html.unescape(t)
-    t = re.sub(r"[ \t\f\v]+", " ", t)
-    t = re.sub(r"\s*\n+\s*", "\n", t)
-    return t
+    # newline runs first: they swallow the spaces around line breaks, leaving less for the space pass
+    t = _collapse_newline_runs(t)
+    return _HSPACE_RUN_RE.sub(" ", t)
 
-def first_json_blob(text: str) -> dict | list | None:
+_JSON_DECODER = json.JSONDecoder()
+_SCRIPT_RE = re.compile(r"<script[^>]*>(.*?)</script>", flags=re.S | re.I)
+_ASMX_D_RE = re.compile(r'"\s*d\s*"\s*:\s*"(.+)"\s*}', flags=re.S)
+
+def _bracket_span_json(text: str) -> dict | list | None:
+    """
+    The page-wide fallback: text from the first "{" (or "[") that has a closing "}" (or "]") after it
+    up to the last one, if that span is exactly one JSON value. One raw_decode from the opening bracket
+    decides it (a value ending anywhere else means the span isn't JSON), so there is no backtracking
+    regex and no copy of the span.
+    """
+    last_curly, last_square = text.rfind("}"), text.rfind("]")
+    spans = [(text.find(opener, 0, last), last) for opener, last in (("{", last_curly), ("[", last_square)) if last > 0]
+    spans = [(i, last) for i, last in spans if i >= 0]
+    if not spans:
+        return None
+    i, last = min(spans)
+    try:
+        value, end = _JSON_DECODER.raw_decode(text, i)
+    except Exception:
+        return None
+    return value if end == last + 1 else None
+
+def iter_embedded_json(text: str):
     """
-    Try to extract the first JSON object/array from HTML/text, including JSON-LD.
+    Every JSON value embedded in HTML/text, best candidates first: the whole body when it is JSON,
+    then each <script> block in order (plain JSON / JSON-LD, &quot;-escaped JSON, ASMX {"d":"..."}
+    payloads), then the page-wide bracket span. Lazy, so callers that take the first stop early.
     """
     t = text.strip()
     # whole body is JSON?
     if t.startswith("{") or t.startswith("["):
         try:
-            return json.loads(t)
+            yield json.loads(t)
         except Exception:
             pass
 
-    # Look inside <script> tags for JSON quickly
-    scripts = re.findall(r"<script[^>]*>(.*?)</script>", text, flags=re.S|re.I)
-    for sc in scripts:
+    # <script> blocks
+    for m in _SCRIPT_RE.finditer(text):
+        sc = m.group(1)
         sc_t = sc.strip()
         if not sc_t:
             continue
         if sc_t.startswith("{") or sc_t.startswith("["):
             for _ in (0, 1):
                 try:
-                    return json.loads(sc_t)
+                    yield json.loads(sc_t)
+                    break
                 except Exception:
                     sc_t = sc_t.replace("&quot;", '"').replace("&amp;", "&")
 
         # ASMX sometimes: {"d":"...json..."}
-        m_d = re.search(r'"\s*d\s*"\s*:\s*"(.+)"\s*}', sc, flags=re.S)
+        m_d = _ASMX_D_RE.search(sc)
         if m_d:
             try:
                 inner = m_d.group(1)
                 inner = inner.encode("utf-8").decode("unicode_escape")
-                return json.loads(inner)
+                yield json.loads(inner)
             except Exception:
                 pass
 
-    # Generic fallback: first {...} or [...]
-    m = re.search(r"(\{.*\}|\[.*\])", text, flags=re.S)
-    if m:
-        j = m.group(1)
-        try:
-            return json.loads(j)
-        except Exception:
-            try:
-                j2 = json.loads(j)
-                return j2 if isinstance(j2, (dict, list)) else None
-            except Exception:
-                return None
-    return None
+    # Generic fallback: first {...} or [...] spanning the page
+    blob = _bracket_span_json(text)
+    if blob is not None:
+        yield blob
+
+def first_json_blob(text: str) -> dict | list | None:
+    """Try to extract the first JSON object/array from HTML/text, including JSON-LD."""
+    return next(iter_embedded_json(text), None)
 
 def extract_numbers_generic(text: str, count_main: int = 5) -> list[int] | None:
     """
@@ -252,6 +344,40 @@ def _looks_like_json(body: bytes) -> bool:
     t = body.lstrip()[:1]
     return t in (b"{", b"[")
 
+class SourceDocument:
+    """
+    One Layer 1 body as every parser (and fallback) sees it. Each view is computed at most once,
+    on first use; treat the parsed JSON as read-only, parsers share it.
+      body  raw bytes
+      text  UTF-8 decoded (errors ignored)
+      plain html_to_text(text)
+      blob  first embedded JSON value (first_json_blob) or None
+      data  the whole body parsed as JSON, else blob
+    """
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+    @functools.cached_property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="ignore")
+
+    @functools.cached_property
+    def plain(self) -> str:
+        return html_to_text(self.text)
+
+    @functools.cached_property
+    def blob(self) -> dict | list | None:
+        return first_json_blob(self.text)
+
+    @functools.cached_property
+    def data(self) -> dict | list | None:
+        try:
+            value = json.loads(self.text)
+        except Exception:
+            value = None
+        return value if value is not None else self.blob
+
 def _iter_dicts_anywhere(obj):
     """Yield all dict nodes inside a JSON-like structure."""
     if isinstance(obj, dict):
@@ -377,21 +503,16 @@ def _guess_game_from_context(meta: dict, nearby_text: str = "") -> str:
     # state sites — leave generic; higher layers can filter later
     return "Unknown"
 
-def parse_json_generic(body_bytes: bytes, meta: dict) -> list[dict]:
+def parse_json_generic(doc: SourceDocument, meta: dict) -> list[dict]:
     """
     Walk any JSON, try to synthesize records from dict-ish rows that contain date + numbers,
     grab jackpot/winners if present. Aggressive but capped.
     """
-    try:
-        root = json.loads(body_bytes.decode("utf-8", errors="ignore"))
-    except Exception:
-        # maybe JSON is embedded in HTML
-        text = body_bytes.decode("utf-8", errors="ignore")
-        blob = first_json_blob(text)
-        if blob is None:
-            return []
-        root = blob
+    # the body itself, or JSON embedded in HTML
+    return harvest_json(doc.data, meta)
 
+def harvest_json(root, meta: dict) -> list[dict]:
+    """parse_json_generic's walker over an already parsed JSON value."""
     out = []
     count = 0
     for node in _iter_dicts_anywhere(root):
@@ -437,7 +558,7 @@ def parse_json_generic(body_bytes: bytes, meta: dict) -> list[dict]:
 
 # ---------- per-source parsers (specialized) ----------
 
-def parse_powerball(body_bytes: bytes, meta: dict) -> list[dict]:
+def parse_powerball(doc: SourceDocument, meta: dict) -> list[dict]:
     """
     Robust Powerball parsing:
     - Try raw JSON / dict["items"]
@@ -445,18 +566,10 @@ def parse_powerball(body_bytes: bytes, meta: dict) -> list[dict]:
     - Fallback: HTML stripped to text, then regex for five numbers + 'Powerball' near bonus
     - Finally: generic JSON walk if we missed it
     """
-    text = body_bytes.decode("utf-8", errors="ignore")
     out = []
 
     # JSON / JSON-LD paths
-    data = None
-    try:
-        data = json.loads(text)
-    except Exception:
-        pass
-    if data is None:
-        data = first_json_blob(text)
-
+    data = doc.data
     if data is not None:
         arr = data["items"] if isinstance(data, dict) and "items" in data else data
         if isinstance(arr, list):
@@ -492,7 +605,7 @@ def parse_powerball(body_bytes: bytes, meta: dict) -> list[dict]:
 
     if not out:
         # HTML fallback — strip markup so numbers separated by tags become visible
-        plain = html_to_text(text)
+        plain = doc.plain
         cand = _numbers_near_keyword(plain, "Powerball") or extract_numbers_generic(plain, 5)
         if cand:
             out.append(
@@ -509,16 +622,15 @@ def parse_powerball(body_bytes: bytes, meta: dict) -> list[dict]:
 
     # last chance: generic JSON mining (handles odd shapes embedded)
     if not out:
-        out = parse_json_generic(body_bytes, meta)
+        out = parse_json_generic(doc, meta)
 
     return out
 
-def parse_megamillions_asmx(body_bytes: bytes, meta: dict) -> list[dict]:
-    text = body_bytes.decode("utf-8", errors="ignore")
-    blob = first_json_blob(text)
+def parse_megamillions_asmx(doc: SourceDocument, meta: dict) -> list[dict]:
+    blob = doc.blob
     if blob is None:
         # try generic walker anyway (some deployments wrap ASMX differently)
-        return parse_json_generic(body_bytes, meta)
+        return parse_json_generic(doc, meta)
     rows = blob if isinstance(blob, list) else [blob]
     out = []
     for row in rows:
@@ -559,38 +671,55 @@ _STATE_GAME_HINTS = [
     ("Cash 4 Life",    "Cash4Life",    "Cash Ball"),
 ]
 
-def _parse_state_generic(text_html: str, meta: dict, host_label: str) -> list[dict]:
+# one pass finds every label occurrence; the group number says which hint matched (labels never overlap)
+_STATE_LABEL_RE = re.compile("|".join(f"({re.escape(label)})" for label, _, _ in _STATE_GAME_HINTS), flags=re.I)
+# start of every run of five small numbers: the number patterns cannot match anywhere else
+_NUMBER_RUN_RE = re.compile(r"(?=\d{1,2}(?:[,\s]+\d{1,2}){4})")
+
+def _parse_state_generic(doc: SourceDocument, meta: dict, host_label: str) -> list[dict]:
     """
     Greedy scraper for state pages that render numbers in HTML.
     Strategy:
       - Convert whole HTML to plain text
-      - For each game label, scan ALL occurrences with a large window (±STATE_SCAN_WINDOW)
+      - Index label occurrences and number-run starts in one pass each
+      - For each game label, scan ALL occurrences with a large window (±STATE_SCAN_WINDOW);
+        windows without a number run are skipped via bisect, the rest are scanned from their first run
       - Try keyword-based bonus detection, then generic 5+1
       - Sniff a date from the local window (fallback to page-level date)
     """
-    raw_text = html_to_text(text_html)
+    raw_text = doc.plain
     out = []
 
     page_date = _sniff_date_from_text(raw_text)
 
-    for label, game_name, bonus_key in _STATE_GAME_HINTS:
-        for m in re.finditer(re.escape(label), raw_text, flags=re.I):
+    hits = [[] for _ in _STATE_GAME_HINTS]
+    for m in _STATE_LABEL_RE.finditer(raw_text):
+        hits[m.lastindex - 1].append(m)
+    runs = [m.start() for m in _NUMBER_RUN_RE.finditer(raw_text)]
+
+    def scan(start: int, end: int, bonus_key: str) -> list[int] | None:
+        # no match can start before the window's first run, and a run starts on a digit, so the
+        # shortened window collapses to a suffix of the full one and yields the same first match
+        i = bisect.bisect_left(runs, start)
+        if i == len(runs) or runs[i] >= end:
+            return None
+        window = raw_text[runs[i]:end]
+        return _numbers_near_keyword(window, bonus_key) or extract_numbers_generic(window, 5)
+
+    for (label, game_name, bonus_key), found in zip(_STATE_GAME_HINTS, hits):
+        for m in found:
             start = max(0, m.start() - STATE_SCAN_WINDOW)
             end   = min(len(raw_text), m.end() + STATE_SCAN_WINDOW)
-            window = raw_text[start:end]
 
-            cand = _numbers_near_keyword(window, bonus_key) or extract_numbers_generic(window, 5)
+            cand = scan(start, end, bonus_key)
             if not cand and (end-start) < HARD_SCAN_WINDOW:
                 # enlarge once if window was too small
-                start2 = max(0, m.start() - HARD_SCAN_WINDOW)
-                end2   = min(len(raw_text), m.end() + HARD_SCAN_WINDOW)
-                window2 = raw_text[start2:end2]
-                cand = _numbers_near_keyword(window2, bonus_key) or extract_numbers_generic(window2, 5)
+                cand = scan(max(0, m.start() - HARD_SCAN_WINDOW), min(len(raw_text), m.end() + HARD_SCAN_WINDOW), bonus_key)
 
             if cand:
                 out.append(
                     make_record(
-                        _sniff_date_from_text(window) or page_date,
+                        _sniff_date_from_text(raw_text[start:end]) or page_date,
                         game_name,
                         cand,
                         None,
@@ -601,31 +730,30 @@ def _parse_state_generic(text_html: str, meta: dict, host_label: str) -> list[di
                 )
     return out
 
-def parse_walottery_html(body_bytes: bytes, meta: dict) -> list[dict]:
-    return _parse_state_generic(body_bytes.decode("utf-8", errors="ignore"), meta, "WA Lottery")
+def parse_walottery_html(doc: SourceDocument, meta: dict) -> list[dict]:
+    return _parse_state_generic(doc, meta, "WA Lottery")
 
-def parse_mdlottery_html(body_bytes: bytes, meta: dict) -> list[dict]:
+def parse_mdlottery_html(doc: SourceDocument, meta: dict) -> list[dict]:
     # Try HTML text scrape…
-    html_recs = _parse_state_generic(body_bytes.decode("utf-8", errors="ignore"), meta, "MD Lottery")
+    html_recs = _parse_state_generic(doc, meta, "MD Lottery")
     if html_recs:
         return html_recs
     # …and also attempt JSON mining from any embedded blobs
-    return parse_json_generic(body_bytes, meta)
+    return parse_json_generic(doc, meta)
 
-def parse_rilot_html(body_bytes: bytes, meta: dict) -> list[dict]:
-    html_recs = _parse_state_generic(body_bytes.decode("utf-8", errors="ignore"), meta, "RI Lottery")
+def parse_rilot_html(doc: SourceDocument, meta: dict) -> list[dict]:
+    html_recs = _parse_state_generic(doc, meta, "RI Lottery")
     if html_recs:
         return html_recs
-    return parse_json_generic(body_bytes, meta)
+    return parse_json_generic(doc, meta)
 
 # --- Multi-state HTML pages (still supported) ---
 
-def parse_luckyforlife_html(body_bytes: bytes, meta: dict) -> list[dict]:
-    text = body_bytes.decode("utf-8", errors="ignore")
-    blob = first_json_blob(text)
+def parse_luckyforlife_html(doc: SourceDocument, meta: dict) -> list[dict]:
+    blob = doc.blob
     if isinstance(blob, (dict, list)):
         # mine JSON first
-        recs = parse_json_generic(body_bytes, meta)
+        recs = parse_json_generic(doc, meta)
         if recs:
             return recs
         # fallback to quick scan
@@ -636,7 +764,7 @@ def parse_luckyforlife_html(body_bytes: bytes, meta: dict) -> list[dict]:
                 normalize_date(blob_txt), "Lucky for Life", cand, None, None,
                 meta.get("final_url") or meta.get("url"), meta.get("fetched_at")
             )]
-    plain = html_to_text(text)
+    plain = doc.plain
     cand = _numbers_near_keyword(plain, "Lucky Ball") or extract_numbers_generic(plain, 5)
     if cand:
         return [make_record(
@@ -645,11 +773,10 @@ def parse_luckyforlife_html(body_bytes: bytes, meta: dict) -> list[dict]:
         )]
     return []
 
-def parse_lottoamerica_html(body_bytes: bytes, meta: dict) -> list[dict]:
-    text = body_bytes.decode("utf-8", errors="ignore")
-    blob = first_json_blob(text)
+def parse_lottoamerica_html(doc: SourceDocument, meta: dict) -> list[dict]:
+    blob = doc.blob
     if isinstance(blob, (dict, list)):
-        recs = parse_json_generic(body_bytes, meta)
+        recs = parse_json_generic(doc, meta)
         if recs:
             return recs
         blob_txt = json.dumps(blob)
@@ -659,7 +786,7 @@ def parse_lottoamerica_html(body_bytes: bytes, meta: dict) -> list[dict]:
                 normalize_date(blob_txt), "Lotto America", cand, None, None,
                 meta.get("final_url") or meta.get("url"), meta.get("fetched_at")
             )]
-    plain = html_to_text(text)
+    plain = doc.plain
     cand = _numbers_near_keyword(plain, "Star Ball") or extract_numbers_generic(plain, 5)
     if cand:
         return [make_record(
@@ -668,11 +795,10 @@ def parse_lottoamerica_html(body_bytes: bytes, meta: dict) -> list[dict]:
         )]
     return []
 
-def parse_cash4life_html(body_bytes: bytes, meta: dict) -> list[dict]:
-    text = body_bytes.decode("utf-8", errors="ignore")
-    blob = first_json_blob(text)
+def parse_cash4life_html(doc: SourceDocument, meta: dict) -> list[dict]:
+    blob = doc.blob
     if isinstance(blob, (dict, list)):
-        recs = parse_json_generic(body_bytes, meta)
+        recs = parse_json_generic(doc, meta)
         if recs:
             return recs
         blob_txt = json.dumps(blob)
@@ -682,7 +808,7 @@ def parse_cash4life_html(body_bytes: bytes, meta: dict) -> list[dict]:
                 normalize_date(blob_txt), "Cash4Life", cand, None, None,
                 meta.get("final_url") or meta.get("url"), meta.get("fetched_at")
             )]
-    plain = html_to_text(text)
+    plain = doc.plain
     cand = _numbers_near_keyword(plain, "Cash Ball") or extract_numbers_generic(plain, 5)
     if cand:
         return [make_record(
@@ -691,31 +817,30 @@ def parse_cash4life_html(body_bytes: bytes, meta: dict) -> list[dict]:
         )]
     return []
 
-def parse_unknown(body: bytes, meta: dict) -> list[dict]:
+def parse_unknown(doc: SourceDocument, meta: dict) -> list[dict]:
     """
     New behavior:
       1) If it smells like JSON or contains a JSON blob — run generic JSON harvester.
       2) Otherwise strip HTML → text and look for any 5+1 sets with common bonus keywords,
          then generic 5+1 pattern with a sniffed date.
     """
-    if _looks_like_json(body):
-        recs = parse_json_generic(body, meta)
+    if _looks_like_json(doc.body):
+        recs = parse_json_generic(doc, meta)
         if recs:
             return recs
 
-    text = body.decode("utf-8", errors="ignore")
     # try to mine any embedded JSON
-    blob = first_json_blob(text)
+    blob = doc.blob
     if blob is not None:
         try:
-            recs = parse_json_generic(json.dumps(blob).encode("utf-8"), meta)
+            recs = harvest_json(blob, meta)
             if recs:
                 return recs
         except Exception:
             pass
 
     # HTML fallback
-    plain = html_to_text(text)
+    plain = doc.plain
     for key, game in (("Powerball","Powerball"),
                       ("Mega Ball","Mega Millions"),
                       ("Lucky Ball","Lucky for Life"),
@@ -752,6 +877,101 @@ PARSERS = {
     "www.rilot.com":            parse_rilot_html,
 }
 
+# ---------- parse cache ----------
+
+class ParseCache:
+    """
+    {key: {"records", "used"}} from earlier runs. The key covers everything a parser reads:
+    body sha256, parser name, PARSER_VERSION and the source URL (records embed it and games are
+    guessed from it); fetched_at is passed through untouched, so hits are re-stamped with the
+    current sidecar's.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.hits = self.misses = 0
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self._entries = data if isinstance(data, dict) else {}
+        except Exception:
+            self._entries = {}
+        self._today = datetime.date.today().isoformat()
+
+    @staticmethod
+    def key(sha256: str, parser, meta: dict) -> str:
+        return f"{sha256}:{parser.__name__}:{PARSER_VERSION}:{meta.get('final_url') or meta.get('url') or ''}"
+
+    def get(self, sha256: str, parser, meta: dict) -> list[dict] | None:
+        entry = self._entries.get(self.key(sha256, parser, meta))
+        if entry is None:
+            return None
+        entry["used"] = self._today
+        self.hits += 1
+        return [dict(r, fetched_at=meta.get("fetched_at")) for r in entry["records"]]
+
+    def put(self, sha256: str, parser, meta: dict, recs: list[dict]):
+        self._entries[self.key(sha256, parser, meta)] = {"records": recs, "used": self._today}
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def save(self):
+        cutoff = (datetime.date.today() - datetime.timedelta(days=PARSE_CACHE_TTL_DAYS)).isoformat()
+        entries = {k: v for k, v in self._entries.items() if v.get("used", "") >= cutoff}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(entries, separators=(",", ":"), sort_keys=True), encoding="utf-8")
+        tmp.replace(self.path)
+
+def parse_source(doc: SourceDocument, meta: dict, parser) -> list[dict]:
+    """Records for one body: its routed parser, then the generic JSON walker as a fallback."""
+    recs = parser(doc, meta)
+
+    # Safety: if specialized parser returns nothing and body is JSON/has JSON, try generic walker too.
+    if not recs:
+        if _looks_like_json(doc.body) or doc.blob is not None:
+            recs = parse_json_generic(doc, meta)
+    return recs
+
+# ---------- parallel parsing ----------
+
+def _parse_file(src: pathlib.Path, meta: dict, parser) -> tuple[list[dict], bool] | None:
+    """Read + parse one body (runs in a pool worker); None when unreadable. bool: safe to cache."""
+    try:
+        body = at_rest.read_bytes(src)
+    except (OSError, RuntimeError):  # missing, or .zst without the zstandard module
+        return None
+    fallbacks = _today_fallbacks
+    recs = parse_source(SourceDocument(body), meta, parser)
+    return recs, _today_fallbacks == fallbacks  # records dated "today" by default would go stale
+
+def parse_workers(jobs: int) -> int:
+    """PARSE_WORKERS (an int) or, by default, one per core when there are enough bodies to parse."""
+    try:
+        return max(1, int(os.getenv("PARSE_WORKERS", "")))
+    except ValueError:
+        return (os.cpu_count() or 1) if jobs >= PARALLEL_MIN_FILES else 1
+
+def parse_files(items: list[tuple[pathlib.Path, dict, object]], workers: int) -> list:
+    """_parse_file() over items, in item order; largest bodies are handed out first."""
+    if workers <= 1 or len(items) < 2:
+        return [_parse_file(*it) for it in items]
+
+    def size(i):
+        p = at_rest.resolve(items[i][0])
+        return p.stat().st_size if p is not None else 0
+
+    results = [None] * len(items)
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(items))) as pool:
+            futures = {i: pool.submit(_parse_file, *items[i]) for i in sorted(range(len(items)), key=size, reverse=True)}
+            for i, fut in futures.items():
+                results[i] = fut.result()
+    except (OSError, NotImplementedError, BrokenProcessPool) as e:  # no usable process pool here
+        print(f"WARN: parallel parsing unavailable ({e}); parsing in-process", file=sys.stderr)
+        return [_parse_file(*it) for it in items]
+    return results
+
 # ---------- main ----------
 
 def main():
@@ -761,30 +981,63 @@ def main():
 
     records = []
     by_host = {}
-
-    for src in sorted(run_dir.glob("source_*.*")):
-        if src.suffix not in (".json", ".html", ".xml", ".txt", ".bin"):
+    source_dates = {}  # Layer 1 target URL -> {game: newest parsed draw date} (draw-aware fetch scheduler)
+    cache = ParseCache(PARSE_CACHE_PATH) if os.getenv("PARSE_CACHE", "1") != "0" else None
+
+    # Pass 1 (source order): route each body, reuse cached records
+    jobs = []  # [src, meta, host, parser, sha, recs or None]
+    for src, meta in run_sources(run_dir):
+        # Layer 1 couldn't undo the Content-Encoding (e.g. br without brotli): nothing to parse
+        if meta.get("content_encoding_undecoded"):
             continue
 
-        meta = load_sidecar_meta(src) or {}
-        body = src.read_bytes()
-
         host = ""
         try:
             host = urlparse(meta.get("final_url") or meta.get("url") or "").netloc
         except Exception:
             pass
-
         parser = PARSERS.get(host, parse_unknown)
-        recs = parser(body, meta)
-
-        # Safety: if specialized parser returns nothing and body is JSON/has JSON, try generic walker too.
-        if not recs:
-            if _looks_like_json(body) or first_json_blob(body.decode("utf-8", errors="ignore")) is not None:
-                recs = parse_json_generic(body, meta)
 
+        # Unchanged body (sidecar sha256) parsed before: reuse its records without reading it
+        sha = meta.get("sha256")
+        recs = cache.get(sha, parser, meta) if cache and sha and at_rest.exists(src) else None
+        if recs is None and cache and not sha:
+            try:
+                sha = hashlib.sha256(at_rest.read_bytes(src)).hexdigest()
+            except (OSError, RuntimeError):  # missing, or .zst without the zstandard module
+                continue
+            recs = cache.get(sha, parser, meta)
+        jobs.append([src, meta, host, parser, sha, recs])
+
+    # Pass 2: parse the rest (process pool when worthwhile), results back in source order
+    todo = [j for j in jobs if j[5] is None]
+    workers = parse_workers(len(todo))
+    for job, res in zip(todo, parse_files([(j[0], j[1], j[3]) for j in todo], workers)):
+        if res is None:
+            job[5] = False  # unreadable: skipped
+            continue
+        job[5], cacheable = res
+        if cache:
+            cache.misses += 1
+            if cacheable:
+                cache.put(job[4], job[3], job[1], job[5])
+
+    # Pass 3 (source order): merge
+    for src, meta, host, parser, sha, recs in jobs:
+        if recs is False:
+            continue
         records.extend(recs)
         by_host[host] = by_host.get(host, 0) + len(recs)
+        for r in recs:
+            if ISO_DATE_RE.match(r["date"]) and meta.get("url"):
+                dates = source_dates.setdefault(meta["url"], {})
+                if r["date"] > dates.get(r["game"], ""):
+                    dates[r["game"]] = r["date"]
+
+    cache_stats = None
+    if cache:
+        cache.save()
+        cache_stats = cache.stats()
 
     # De-duplicate by (game,date,numbers)
     seen, unique = set(), []
@@ -804,7 +1057,10 @@ def main():
         "last_updated": now.isoformat() + "Z",
         "records": unique,
         "parse_stats": by_host,
+        "source_dates": source_dates,
     }
+    if cache_stats is not None:
+        dataset["parse_cache"] = cache_stats
 
     json_path = out_dir / "latest-draws.json"
     csv_path  = out_dir / "latest-draws.csv"
@@ -826,11 +1082,14 @@ def main():
                 r["source_url"] or "",
                 r["fetched_at"] or "",
             ])
+    retention.mark_latest(L2_OUT, out_dir)
 
     print(json.dumps({
         "run_id": out_dir.name,
         "records": len(unique),
         "by_host": by_host,
+        "parse_cache": cache_stats,
+        "workers": workers,
         "json": json_path.name,
         "csv":  csv_path.name,
     }, indent=2))
@@ -1,4 +1,7 @@
-import os, json, pathlib, datetime, shutil, hashlib
+import os, sys, json, pathlib, datetime, shutil, hashlib
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "layer1"))
+import retention  # layer1/retention.py: layer2/out/LATEST pointer
 
 BASE = pathlib.Path(".")
 PUBLIC = BASE / "public"
@@ -14,10 +17,10 @@ CANONICAL_BASE = "https://whatwouldyoudoifyouwonthelottery.com"
 DATASET_BASENAME = "latest-draws"  # stable filename for verify.sh
 
 def latest_run(dirpath: pathlib.Path) -> pathlib.Path:
-    runs = [p for p in dirpath.iterdir() if p.is_dir()]
-    if not runs:
+    run = retention.latest_run(dirpath)
+    if run is None:
         raise SystemExit("No layer2 runs found.")
-    return sorted(runs)[-1]
+    return run
 
 def sha256(p: pathlib.Path) -> str:
     h = hashlib.sha256()
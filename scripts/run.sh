@@ -1,5 +1,5 @@
 #!/bin/sh
-# Portable one-command runner: fetch -> parse -> publish -> verify -> manifest
+# Portable one-command runner: fetch -> parse -> publish -> verify -> retention -> manifest
 # POSIX /bin/sh; runs from any CWD; streams live logs from Python.
 
 set -eu
@@ -50,6 +50,11 @@ banner() {
 # --- Surfacing env toggles for Layer 1 ---
 FAST="${FAST:-}"                 # FAST=1 for quicker pacing
 LIMIT="${LIMIT:-}"               # LIMIT=5 to cap number of targets
+CONCURRENCY="${CONCURRENCY:-}"   # CONCURRENCY=1 for strictly sequential fetching
+RESUME="${RESUME:-}"             # RESUME=<layer1 run_id> to continue an interrupted fetch from its journal
+SCHEDULE="${SCHEDULE:-1}"        # SCHEDULE=0 to ignore the draw calendar and fetch every target
+COMPRESS="${COMPRESS:-}"         # COMPRESS=gz|zst to store fetched bodies compressed (default: pacing.yaml)
+RETAIN="${RETAIN:-1}"            # RETAIN=0 to keep every run dir (no pruning / archiving, layer1/retention.yaml)
 
 # Choose targets list:
 # - If TARGETS is set, use it.
@@ -66,33 +71,41 @@ else
 fi
 export TARGETS_FILE
 
-banner "🟡" "[1/5] Layer 1 — Fetch (targets: $TARGETS_FILE)"
+banner "🟡" "[1/6] Layer 1 — Fetch (targets: $TARGETS_FILE)"
 # Unbuffered Python so logs stream immediately
-if ! FAST="$FAST" LIMIT="$LIMIT" PYTHONUNBUFFERED=1 python3 "$ROOT/layer1/fetch.py"; then
+if ! FAST="$FAST" LIMIT="$LIMIT" CONCURRENCY="$CONCURRENCY" SCHEDULE="$SCHEDULE" COMPRESS="$COMPRESS" PYTHONUNBUFFERED=1 python3 "$ROOT/layer1/fetch.py" ${RESUME:+--resume "$RESUME"}; then
   echo "WARN: Layer 1 completed with errors (continuing)" >&2
   STATUS="warn"
 fi
 
-banner "🟠" "[2/5] Layer 2 — Parse & Classify"
+banner "🟠" "[2/6] Layer 2 — Parse & Classify"
 if ! python3 "$ROOT/layer2/parse_and_classify.py"; then
   echo "ERROR: Layer 2 failed (stopping run)" >&2
   STATUS="error"
   exit 1
 fi
 
-banner "🟣" "[3/5] Layer 3 — Publish"
+banner "🟣" "[3/6] Layer 3 — Publish"
 if ! python3 "$ROOT/layer3/publish.py"; then
   echo "ERROR: Layer 3 failed (stopping run)" >&2
   STATUS="error"
   exit 1
 fi
 
-banner "🟦" "[4/5] Verify"
+banner "🟦" "[4/6] Verify"
 if ! sh "$ROOT/scripts/verify.sh"; then
   echo "WARN: Verify checks failed (continuing)" >&2
   STATUS="warn"
 fi
 
-banner "🟢" "[5/5] Atomic ship"
+banner "🧹" "[5/6] Retention"
+if [ "$RETAIN" = "0" ]; then
+  echo "RETAIN=0: keeping every run dir"
+elif ! python3 "$ROOT/layer1/retention.py"; then
+  echo "WARN: Retention failed (continuing)" >&2
+  STATUS="warn"
+fi
+
+banner "🟢" "[6/6] Atomic ship"
 # Static hosting serves /public; publisher already wrote final files.
 echo "✅ Done."
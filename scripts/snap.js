@@ -1,19 +1,91 @@
 // scripts/snap.js
 const fs = require('fs');
 const path = require('path');
+const zlib = require('zlib');
+const { execFileSync } = require('child_process');
 const { chromium } = require('playwright');
 
+const ROOT = path.join(__dirname, '..');
+
+const slugFor = url => url.replace(/[^a-z0-9]+/gi, '_').slice(0, 120);
+
+// COMPRESS=gz|zst stores the text artifacts (.html, .network.json, .body.json) as <name>.gz / .zst;
+// Layer 2 reads them through layer1/at_rest.py. Sidecars (.meta.json) and screenshots stay as they are.
+// zst needs a Node with zlib zstd support; gz is used otherwise.
+const COMPRESS = (() => {
+  const m = (process.env.COMPRESS || '').toLowerCase();
+  if (m === 'zst' || m === 'zstd') return typeof zlib.zstdCompressSync === 'function' ? 'zst' : 'gz';
+  return m === 'gz' || m === 'gzip' ? 'gz' : null;
+})();
+
+function writeArtifact(file, text) {
+  const stale = [file, file + '.gz', file + '.zst'];
+  let target = file;
+  let data = Buffer.from(text, 'utf8');
+  if (COMPRESS === 'gz') {
+    target = file + '.gz';
+    data = zlib.gzipSync(data, { level: 6 });
+  } else if (COMPRESS === 'zst') {
+    target = file + '.zst';
+    data = zlib.zstdCompressSync(data);
+  }
+  fs.writeFileSync(target, data);
+  // an older variant left next to it would shadow or duplicate this one
+  for (const f of stale) {
+    if (f !== target) fs.rmSync(f, { force: true });
+  }
+}
+
+// Draw-calendar-aware target list (layer1/draw_schedule.py; SCHEDULE=0 snaps everything).
+// mode "skip": targets with no new draw keep their previous good snapshot; "defer": snapped last.
+function applyDrawSchedule(urls, outdir) {
+  let plan, mode;
+  try {
+    const out = execFileSync('python3', [path.join(ROOT, 'layer1', 'draw_schedule.py'), '--json', '-'], {
+      cwd: ROOT,
+      input: urls.join('\n'),
+      encoding: 'utf8',
+    });
+    ({ mode, plan } = JSON.parse(out));
+  } catch (e) {
+    console.log('SNAP SCHEDULE unavailable, snapping everything:', e.message || e);
+    return urls;
+  }
+  const due = plan.filter(p => p.due).map(p => p.url);
+  const notDue = plan.filter(p => !p.due);
+  console.log(`SNAP SCHEDULE ${due.length} due, ${notDue.length} with no new draw (mode=${mode})`);
+  if (mode === 'defer') {
+    return due.concat(notDue.map(p => p.url));
+  }
+  const keep = new Set();
+  for (const p of notDue) {
+    try {
+      const meta = JSON.parse(fs.readFileSync(path.join(outdir, slugFor(p.url) + '.meta.json'), 'utf8'));
+      if (!meta.error) {
+        keep.add(p.url);
+        console.log('SNAP SKIP', p.url, '-', p.reason);
+      }
+    } catch {
+      /* no previous snapshot: snap it anyway */
+    }
+  }
+  return urls.filter(u => !keep.has(u));
+}
+
 (async () => {
   const infile = process.argv[2] || 'layer1/targets.txt';
   const outdir = process.argv[3] || 'layer1/snaps';
   fs.mkdirSync(outdir, { recursive: true });
 
   // read lines, ignore empty & pure comment lines
-  const urls = fs
+  let urls = fs
     .readFileSync(infile, 'utf8')
     .split(/\r?\n/)
     .map(s => s.trim())
     .filter(s => s && !s.startsWith('#'));
+  if (process.env.SCHEDULE !== '0') {
+    urls = applyDrawSchedule(urls, outdir);
+  }
 
   const browser = await chromium.launch();
   const context = await browser.newContext({
@@ -28,8 +100,7 @@ const { chromium } = require('playwright');
   });
 
   for (const url of urls) {
-    const slug = url.replace(/[^a-z0-9]+/gi, '_').slice(0, 120);
-    const base = path.join(outdir, slug);
+    const base = path.join(outdir, slugFor(url));
 
     const page = await context.newPage();
 
@@ -109,19 +180,19 @@ const { chromium } = require('playwright');
       try {
         const ctMain = (resp && (resp.headers()['content-type'] || '').toLowerCase()) || '';
         if (ctMain.includes('html')) {
-          fs.writeFileSync(base + '.html', await page.content(), 'utf8');
+          writeArtifact(base + '.html', await page.content());
         } else {
           // Fallback: still write DOM content for debugging
-          fs.writeFileSync(base + '.html', await page.content(), 'utf8');
+          writeArtifact(base + '.html', await page.content());
         }
       } catch {
         // best-effort
-        fs.writeFileSync(base + '.html', await page.content(), 'utf8');
+        writeArtifact(base + '.html', await page.content());
       }
 
-      fs.writeFileSync(base + '.network.json', JSON.stringify(nets, null, 2));
+      writeArtifact(base + '.network.json', JSON.stringify(nets, null, 2));
       if (firstJsonBody) {
-        fs.writeFileSync(base + '.body.json', firstJsonBody);
+        writeArtifact(base + '.body.json', firstJsonBody);
       }
       fs.writeFileSync(base + '.meta.json', JSON.stringify(meta, null, 2));
 